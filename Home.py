@@ -1,6 +1,6 @@
 import streamlit as st
 import pandas as pd
-from utils import predict_aqi, get_settings, apply_theme
+from utils import predict_aqi, get_settings, apply_theme, get_build_queue
 import datetime
 
 
@@ -13,6 +13,9 @@ st.set_page_config(
 
 apply_theme()
 
+# Start warming city models in the background on the first visit
+get_build_queue()
+
 # ------------- CUSTOM CSS ----------------
 st.markdown("""
 <style>
@@ -0,0 +1,33 @@
+"""Shared helpers for the benchmark scripts in this folder."""
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+
+def rss_mb(pid=None):
+    """Resident set size of a process in MB (the current one by default)."""
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss / 1e6
+    except ImportError:
+        with open(f"/proc/{pid or 'self'}/status") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1e3
+    return float("nan")
+
+
+def pss_mb(pid=None):
+    """Proportional set size of a process in MB (the current one by default)."""
+    try:
+        import psutil
+        return psutil.Process(pid).memory_full_info().pss / 1e6
+    except ImportError:
+        with open(f"/proc/{pid or 'self'}/smaps_rollup") as fh:
+            for line in fh:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1]) / 1e3
+    return float("nan")
@@ -0,0 +1,49 @@
+"""
+Bucket classifier vs CPCB thresholds on the predicted AQI.
+
+Prints utils.bucket_mode_report for each city: bucket accuracy of both,
+how often they agree, and what dropping the classifier saves in fit
+time, artifact size and predict latency (switch with AQI_BUCKET_MODE).
+
+    python benchmarks/bucket_mode.py --cities Delhi Mumbai Kolkata --profile balanced
+"""
+import argparse
+
+from _common import ROOT_DIR  # noqa: F401  (puts the repo on sys.path)
+
+import pandas as pd
+
+import utils
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cities", nargs="+", default=["Delhi", "Mumbai", "Jaipur"])
+    parser.add_argument("--profile", choices=list(utils.MODEL_PROFILES))
+    parser.add_argument("--engine", choices=list(utils.MODEL_ENGINES))
+    args = parser.parse_args()
+
+    df = utils.read_dataset()
+    reports = []
+    for city in args.cities:
+        report = utils.bucket_mode_report(city, df, args.profile, args.engine)
+        if report is None:
+            print(f"{city}: below the training threshold, skipped")
+            continue
+        report.insert(0, "city", city)
+        reports.append(report)
+
+    if not reports:
+        return
+
+    table = pd.concat(reports, ignore_index=True)
+    pd.set_option("display.width", 120)
+    print(table.round(3).to_string(index=False))
+    print()
+    print(table.groupby("bucket_mode", sort=False)
+          [["bucket_accuracy", "agreement", "fit_s", "size_mb", "load_ms", "predict_ms"]]
+          .mean().round(3).to_string())
+
+
+if __name__ == "__main__":
+    main()
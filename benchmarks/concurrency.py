@@ -0,0 +1,81 @@
+"""
+Throughput and tail latency under concurrent sessions, with and without
+the shared compute scheduler.
+
+Each simulated session issues a stream of single-row AQI predictions
+against a random forest, with a city model fit every tenth request.
+"direct" calls the models straight from each session thread with
+n_jobs=-1 (the previous behaviour); "scheduled" routes every call
+through utils.run_compute with its fixed worker budget.
+
+    python benchmarks/concurrency.py --sessions 1 2 4 8 16 --requests 40
+"""
+import argparse
+import threading
+import time
+
+from _common import ROOT_DIR  # noqa: F401  (puts the repo on sys.path)
+
+import numpy as np
+
+import utils
+
+
+def _session(name, mode, models, df, city, row, n_requests, latencies):
+    for i in range(n_requests):
+        start = time.perf_counter()
+        if i % 10 == 9:
+            job = (utils.fit_city_models, city, df, "compact")
+        else:
+            job = (models[mode].predict, row)
+        if mode == "direct":
+            job[0](*job[1:])
+        else:
+            utils.run_compute(*job, session=name)
+        latencies.append(time.perf_counter() - start)
+
+
+def run(mode, n_sessions, models, df, city, row, n_requests):
+    latencies = []
+    threads = [
+        threading.Thread(target=_session,
+                         args=(f"s{i}", mode, models, df, city, row, n_requests, latencies))
+        for i in range(n_sessions)
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+
+    ms = np.array(latencies) * 1000
+    return len(ms) / wall, np.percentile(ms, 50), np.percentile(ms, 95), np.percentile(ms, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--city", default="Jaipur")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--requests", type=int, default=40)
+    args = parser.parse_args()
+
+    df = utils.read_dataset()
+    X_train, X_test, y_train, *_ = utils.split_city_data(args.city, df)
+    direct = utils.make_estimator("reg", "random_forest", "balanced").fit(X_train, y_train)
+    scheduled = utils.run_compute(
+        lambda: utils.make_estimator("reg", "random_forest", "balanced").fit(X_train, y_train)
+    )
+    models = {"direct": direct, "scheduled": scheduled}
+    row = X_test.iloc[[0]]
+
+    print(f"compute workers: {utils.COMPUTE_WORKERS}")
+    print(f"{'mode':>9} {'sessions':>8} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for n in args.sessions:
+        for mode in ("direct", "scheduled"):
+            rps, p50, p95, p99 = run(mode, n, models, df, args.city, row, args.requests)
+            print(f"{mode:>9} {n:>8} {rps:>7.1f} {p50:>8.1f} {p95:>8.1f} {p99:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Memory footprint of the shared dataset versus the original per-page
+``pd.read_csv`` load.
+
+Each measurement runs in a fresh subprocess so RSS deltas are not polluted
+by earlier loads. The bundled CSV is also replicated to check that the
+compact representation scales linearly with the number of rows.
+
+    python benchmarks/dataset_memory.py --scales 1 4 16
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from _common import ROOT_DIR, rss_mb
+
+import pandas as pd
+
+
+def _measure(mode, path):
+    import gc
+    import utils
+
+    gc.collect()
+    before = rss_mb()
+    if mode == "legacy":
+        df = pd.read_csv(path, parse_dates=["Date"])
+    else:
+        df = utils.read_dataset(path)
+    gc.collect()
+    return {
+        "rows": len(df),
+        "frame_mb": df.memory_usage(deep=True).sum() / 1e6,
+        "rss_mb": rss_mb() - before,
+    }
+
+
+def _run(mode, path):
+    out = subprocess.run(
+        [sys.executable, __file__, "--child", mode, path],
+        check=True, capture_output=True, text=True, cwd=ROOT_DIR
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(_measure(*args.child)))
+        return
+
+    import utils
+    base = pd.read_csv(utils.DATA_PATH)
+
+    print(f"{'scale':>5} {'rows':>10} {'legacy MB':>10} {'compact MB':>11} "
+          f"{'legacy RSS':>11} {'compact RSS':>12} {'saving':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            path = os.path.join(tmp, f"x{scale}.csv")
+            pd.concat([base] * scale, ignore_index=True).to_csv(path, index=False)
+
+            legacy = _run("legacy", path)
+            compact = _run("compact", path)
+            saving = 1 - compact["frame_mb"] / legacy["frame_mb"]
+            print(f"{scale:>5} {legacy['rows']:>10} {legacy['frame_mb']:>10.1f} "
+                  f"{compact['frame_mb']:>11.1f} {legacy['rss_mb']:>11.1f} "
+                  f"{compact['rss_mb']:>12.1f} {saving:>7.0%}")
+
+
+if __name__ == "__main__":
+    main()
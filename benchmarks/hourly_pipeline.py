@@ -0,0 +1,125 @@
+"""
+Out-of-core hourly pipeline at national scale.
+
+Writes a synthetic hourly station CSV (written in batches, never held in
+memory), then runs utils.rollup_hourly and, with --train, the per-city
+training (tiny profile, City### models saved to MODEL_DIR) in a fresh
+subprocess, reporting time and peak RSS of each stage. --naive also reports a single pd.read_csv + groupby of the same
+file for comparison.
+
+    python benchmarks/hourly_pipeline.py --rows 10000000 --cities 100 --train
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from _common import ROOT_DIR
+
+import numpy as np
+import pandas as pd
+
+
+def _peak_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+
+def write_hourly(path, rows, n_cities, stations, seed=0):
+    """Station-major hourly rows, like a CPCB station_hour export."""
+    rng = np.random.default_rng(seed)
+    hours = rows // (n_cities * stations)
+    stamps = pd.date_range("2015-01-01", periods=hours, freq="h").strftime("%Y-%m-%d %H:%M:%S")
+    season = 1 + 0.5 * np.cos(2 * np.pi * np.arange(hours) / (24 * 365))
+
+    with open(path, "w") as fh:
+        for c in range(n_cities):
+            for s in range(stations):
+                pm25 = rng.gamma(2.0, 30.0, hours) * season
+                batch = pd.DataFrame({
+                    "StationId": f"ST{c:03d}{s}",
+                    "Datetime": stamps,
+                    "City": f"City{c:03d}",
+                    "PM2.5": pm25,
+                    "PM10": pm25 * rng.uniform(1.2, 2.0, hours),
+                    "NO2": rng.gamma(2.0, 15.0, hours),
+                    "SO2": rng.gamma(2.0, 6.0, hours),
+                    "CO": rng.gamma(2.0, 0.6, hours),
+                    "O3": rng.gamma(2.0, 18.0, hours),
+                    "AQI": pm25 * 1.6 + rng.normal(0, 10, hours),
+                })
+                # A few gaps, as in real exports
+                batch.loc[rng.random(hours) < 0.05, "SO2"] = np.nan
+                batch.to_csv(fh, index=False, header=(c == 0 and s == 0), float_format="%.2f")
+    return hours * n_cities * stations
+
+
+def _child(stage, path, chunksize, profile):
+    import utils
+
+    out_dir = os.path.join(os.path.dirname(path), "rollups")
+    start = time.perf_counter()
+    if stage == "rollup":
+        manifest = utils.rollup_hourly(path, out_dir, chunksize)
+        result = {"cities": len(manifest["partitions"])}
+    elif stage == "train":
+        manifest = utils.rollup_hourly(path, out_dir, chunksize)
+        result = {"models": len(utils.train_rollup_models(manifest, profile=profile))}
+    else:
+        df = pd.read_csv(path, usecols=utils.HOURLY_COLUMNS)
+        df["Date"] = pd.to_datetime(df["Datetime"]).dt.normalize()
+        result = {"cities": int(df.groupby(["City", "Date"])[utils.ROLLUP_MEASURES].mean()
+                                .index.get_level_values(0).nunique())}
+    result.update(seconds=time.perf_counter() - start, peak_rss_mb=_peak_mb())
+    return result
+
+
+def _run(stage, path, chunksize, profile):
+    out = subprocess.run(
+        [sys.executable, __file__, "--child", stage, path,
+         "--chunksize", str(chunksize), "--profile", profile],
+        check=True, capture_output=True, text=True, cwd=ROOT_DIR
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--cities", type=int, default=100)
+    parser.add_argument("--stations", type=int, default=4)
+    parser.add_argument("--chunksize", type=int, default=1_000_000)
+    parser.add_argument("--profile", default="tiny")
+    parser.add_argument("--train", action="store_true")
+    parser.add_argument("--naive", action="store_true")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(_child(*args.child, args.chunksize, args.profile)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "station_hour.csv")
+        start = time.perf_counter()
+        rows = write_hourly(path, args.rows, args.cities, args.stations)
+        print(f"wrote {rows:,} rows ({os.path.getsize(path) / 1e9:.2f} GB) "
+              f"in {time.perf_counter() - start:.0f}s")
+
+        stages = ["rollup"] + (["train"] if args.train else []) + (["naive"] if args.naive else [])
+        for stage in stages:
+            result = _run(stage, path, args.chunksize, args.profile)
+            print(f"{stage:>7}: " + ", ".join(
+                f"{k} {v:,.1f}" if isinstance(v, float) else f"{k} {v}" for k, v in result.items()
+            ))
+
+        out_dir = os.path.join(tmp, "rollups")
+        city = next(n for n in sorted(os.listdir(out_dir)) if n.endswith(".csv"))
+        print(f"one city partition: {os.path.getsize(os.path.join(out_dir, city)) / 1e3:.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Concurrent-session load test for the Streamlit pages.
+
+Simulates N sessions with Streamlit's AppTest, all in this process so
+they share caches and the compute scheduler like one server pod does.
+Each session loops through realistic flows: pick a city and predict,
+generate a forecast, move the Visualization sliders, and fetch live
+AQI. WAQI calls go to a local stand-in server started here, which can
+be made slow or failing to rehearse upstream incidents.
+
+Reports latency percentiles per page step, CPU use and peak RSS.
+Pass --json to save the results and compare them between runs.
+
+    AQI_MODEL_PROFILE=compact python benchmarks/load_test.py --sessions 1 4 8
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from _common import ROOT_DIR, rss_mb
+
+import numpy as np
+
+
+class _WaqiStandIn(BaseHTTPRequestHandler):
+    latency = 0.05
+    error_rate = 0.0
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        if random.random() < self.error_rate:
+            self.send_error(503)
+            return
+        rng = random.Random(self.path)
+        body = json.dumps({
+            "status": "ok",
+            "data": {
+                "aqi": rng.randint(40, 350),
+                "dominentpol": "pm25",
+                "iaqi": {key: {"v": round(rng.uniform(1, 200), 1)}
+                         for key in ("pm25", "pm10", "no2", "so2", "co", "o3")},
+            },
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stand_in(latency, error_rate=0.0):
+    _WaqiStandIn.latency = latency
+    _WaqiStandIn.error_rate = error_rate
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _WaqiStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def _page(name):
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(os.path.join(ROOT_DIR, "pages", name), default_timeout=600)
+    at.secrets["WAQI_TOKEN"] = "load-test"
+    return at
+
+
+def flow_manual_prediction(at, rng, cities):
+    at.selectbox[0].select(rng.choice(cities))
+    yield "select city"
+    at.button[0].click()
+    yield "predict"
+
+
+def flow_forecast(at, rng, cities):
+    at.selectbox[0].select(rng.choice(cities))
+    at.slider[0].set_value(rng.randint(3, 14))
+    yield "select city + days"
+    at.button[0].click()
+    yield "generate forecast"
+
+
+def flow_visualization(at, rng, cities):
+    lo, hi = datetime.datetime(2015, 4, 1), datetime.datetime(2020, 7, 1)
+    for i in range(3):
+        start = lo + datetime.timedelta(days=rng.randint(0, 900))
+        end = hi - datetime.timedelta(days=rng.randint(0, 900))
+        at.slider[i % 2].set_value((start, end))
+        yield "move slider"
+
+
+def flow_live_aqi(at, rng, cities):
+    at.text_input[0].input(rng.choice(cities))
+    at.button[0].click()
+    yield "fetch live"
+
+
+def flow_historical_vs_live(at, rng, cities):
+    at.selectbox[0].select(rng.choice(cities))
+    at.button[0].click()
+    yield "compare"
+
+
+FLOWS = {
+    "Manual Prediction": ("2_Manual_Prediction.py", flow_manual_prediction),
+    "Forecast": ("4_Forecast.py", flow_forecast),
+    "Visualization": ("5_Visualization.py", flow_visualization),
+    "Live AQI": ("1_Live_AQI.py", flow_live_aqi),
+    "Historical vs Live": ("3_Historical_vs_Live.py", flow_historical_vs_live),
+}
+
+
+def _session(seed, iterations, cities, timings, errors):
+    rng = random.Random(seed)
+    for _ in range(iterations):
+        for page, (script, flow) in FLOWS.items():
+            at = _page(script)
+            start = time.perf_counter()
+            at.run()
+            timings[(page, "load")].append(time.perf_counter() - start)
+            for step in flow(at, rng, cities):
+                start = time.perf_counter()
+                at.run()
+                timings[(page, step)].append(time.perf_counter() - start)
+                if at.exception:
+                    errors.append(f"{page}/{step}: {at.exception[0].value}")
+
+
+def run(n_sessions, iterations, cities):
+    timings, errors = defaultdict(list), []
+    peak = [rss_mb()]
+    running = threading.Event()
+    running.set()
+
+    def sample():
+        while running.is_set():
+            peak[0] = max(peak[0], rss_mb())
+            time.sleep(0.05)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+
+    cpu_start, wall_start = os.times(), time.perf_counter()
+    threads = [threading.Thread(target=_session, args=(i, iterations, cities, timings, errors))
+               for i in range(n_sessions)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - wall_start
+    cpu_end = os.times()
+    running.clear()
+
+    cpu = (cpu_end.user - cpu_start.user) + (cpu_end.system - cpu_start.system)
+    return {
+        "sessions": n_sessions,
+        "wall_s": wall,
+        "cpu_pct": 100 * cpu / wall / (os.cpu_count() or 1),
+        "peak_rss_mb": peak[0],
+        "errors": errors,
+        "pages": {
+            f"{page}/{step}": {
+                "n": len(values),
+                "p50_ms": float(np.percentile(values, 50) * 1000),
+                "p95_ms": float(np.percentile(values, 95) * 1000),
+                "p99_ms": float(np.percentile(values, 99) * 1000),
+            }
+            for (page, step), values in sorted(timings.items())
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--iterations", type=int, default=2)
+    parser.add_argument("--cities", nargs="+", default=["Delhi", "Mumbai", "Jaipur", "Kolkata"])
+    parser.add_argument("--live-latency", type=float, default=0.05,
+                        help="seconds the WAQI stand-in waits before answering")
+    parser.add_argument("--live-error-rate", type=float, default=0.0,
+                        help="fraction of WAQI stand-in calls that fail with 503")
+    parser.add_argument("--no-warm", action="store_true",
+                        help="skip waiting for the background model builds")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    os.environ["WAQI_BASE_URL"] = start_stand_in(args.live_latency, args.live_error_rate)
+    import utils
+
+    if not args.no_warm:
+        build_queue = utils.get_build_queue()
+        for city in args.cities:
+            build_queue.request(city, utils.load_data())
+        while any(build_queue.state(c) in ("queued", "building") for c in args.cities):
+            time.sleep(0.5)
+
+    results = []
+    for n in args.sessions:
+        result = run(n, args.iterations, args.cities)
+        results.append(result)
+
+        print(f"\n== {n} session(s): {result['wall_s']:.1f}s wall, "
+              f"CPU {result['cpu_pct']:.0f}%, peak RSS {result['peak_rss_mb']:.0f} MB")
+        print(f"{'page/step':<42} {'n':>4} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+        for name, stats in result["pages"].items():
+            print(f"{name:<42} {stats['n']:>4} {stats['p50_ms']:>8.0f} "
+                  f"{stats['p95_ms']:>8.0f} {stats['p99_ms']:>8.0f}")
+        for error in result["errors"][:5]:
+            print(f"  ! {error}")
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Compare the model engines on the trainers' chronological 80/20 split:
+fit time, predict latency, artifact size and held-out MAE for both the
+city models and the forecast model.
+
+    python benchmarks/model_engines.py --cities Delhi Mumbai --profile full
+"""
+import argparse
+
+from _common import ROOT_DIR  # noqa: F401  (puts the repo on sys.path)
+
+import pandas as pd
+
+import utils
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cities", nargs="+", default=["Delhi", "Mumbai", "Jaipur"])
+    parser.add_argument("--engines", nargs="+", default=list(utils.MODEL_ENGINES))
+    parser.add_argument("--profile", default="full", choices=list(utils.MODEL_PROFILES))
+    args = parser.parse_args()
+
+    df = utils.read_dataset()
+    city_rows, forecast_rows = [], []
+    for city in args.cities:
+        for engine in args.engines:
+            report = utils.profile_report(city, df, [args.profile], engine)
+            if report is not None:
+                city_rows.append(report.assign(city=city))
+        report = utils.forecast_report(city, df, args.engines, args.profile)
+        if report is not None:
+            forecast_rows.append(report.assign(city=city))
+
+    columns = ["city", "engine", "mae", "fit_s", "size_mb", "load_ms", "predict_ms"]
+    pd.set_option("display.width", 120)
+    if city_rows:
+        print("City models (AQI regressor + bucket classifier)")
+        print(pd.concat(city_rows)[columns + ["bucket_accuracy"]]
+              .round(3).to_string(index=False))
+        print()
+    if forecast_rows:
+        print("Forecast model")
+        print(pd.concat(forecast_rows)[columns].round(3).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
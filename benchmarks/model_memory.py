@@ -0,0 +1,87 @@
+"""
+Model memory across server worker processes, memory-mapped vs copied.
+
+Builds the city model artifacts once, then starts 1, 4 and 8 worker
+processes that each load every city model, touch all of its arrays and
+hold them while memory is sampled. PSS splits shared pages between the
+processes mapping them, so the total PSS across workers is the real
+cost of the models on the machine.
+
+    python benchmarks/model_memory.py --profile balanced --workers 1 4 8
+"""
+import argparse
+import multiprocessing as mp
+
+from _common import ROOT_DIR, pss_mb  # noqa: F401  (ROOT_DIR puts the repo on sys.path)
+
+import numpy as np
+
+import utils
+
+
+def _touch(obj):
+    if isinstance(obj, np.ndarray):
+        return float(obj.sum())
+    if isinstance(obj, dict):
+        return sum(_touch(v) for v in obj.values())
+    if isinstance(obj, utils.PackedForest):
+        return _touch(obj.packed)
+    return sum(_touch(p.nodes) for preds in getattr(obj, "_predictors", [])
+               for p in preds)
+
+
+def _worker(cities, profile, engine, mmap_mode, loaded, done, results):
+    before = pss_mb()
+    models = [utils.load_city_models(city, profile, engine, mmap_mode)
+              for city in cities]
+    for reg, clf in models:
+        _touch(reg), _touch(clf)
+    loaded.wait()
+    results.put(pss_mb() - before)
+    done.wait()
+
+
+def measure(n_workers, cities, profile, engine, mmap_mode):
+    ctx = mp.get_context("spawn")
+    loaded, done = ctx.Barrier(n_workers), ctx.Barrier(n_workers + 1)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_worker,
+                         args=(cities, profile, engine, mmap_mode, loaded, done, results))
+             for _ in range(n_workers)]
+    for p in procs:
+        p.start()
+    deltas = [results.get() for _ in procs]
+    done.wait()
+    for p in procs:
+        p.join()
+    return sum(deltas)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cities", nargs="+")
+    parser.add_argument("--profile", default="balanced", choices=list(utils.MODEL_PROFILES))
+    parser.add_argument("--engine", default="random_forest", choices=list(utils.MODEL_ENGINES))
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+
+    df = utils.read_dataset()
+    cities = []
+    for city in args.cities or sorted(df["City"].unique()):
+        if utils.load_city_models(city, args.profile, args.engine) is None:
+            reg, clf = utils.fit_city_models(city, df, args.profile, args.engine)
+            if reg is None:
+                continue
+            utils.save_city_models(city, reg, clf, args.profile, args.engine)
+        cities.append(city)
+    print(f"{len(cities)} city models, profile={args.profile}, engine={args.engine}")
+
+    print(f"{'workers':>7} {'mmap MB':>9} {'copied MB':>10}")
+    for n in args.workers:
+        shared = measure(n, cities, args.profile, args.engine, "r")
+        copied = measure(n, cities, args.profile, args.engine, None)
+        print(f"{n:>7} {shared:>9.1f} {copied:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
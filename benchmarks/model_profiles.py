@@ -0,0 +1,47 @@
+"""
+Size / accuracy / latency trade-off of the city model profiles.
+
+Prints utils.profile_report for each city so an operating point can be
+chosen per deployment (set it with AQI_MODEL_PROFILE).
+
+    python benchmarks/model_profiles.py --cities Delhi Mumbai Kolkata
+"""
+import argparse
+
+from _common import ROOT_DIR  # noqa: F401  (puts the repo on sys.path)
+
+import pandas as pd
+
+import utils
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cities", nargs="+", default=["Delhi", "Mumbai", "Jaipur"])
+    parser.add_argument("--profiles", nargs="+", default=list(utils.MODEL_PROFILES))
+    args = parser.parse_args()
+
+    df = utils.read_dataset()
+    reports = []
+    for city in args.cities:
+        report = utils.profile_report(city, df, args.profiles)
+        if report is None:
+            print(f"{city}: below the training threshold, skipped")
+            continue
+        report.insert(0, "city", city)
+        reports.append(report)
+
+    if not reports:
+        return
+
+    table = pd.concat(reports, ignore_index=True)
+    pd.set_option("display.width", 120)
+    print(table.round(3).to_string(index=False))
+    print()
+    print(table.groupby("profile", sort=False)
+          [["mae", "bucket_accuracy", "size_mb", "load_ms", "predict_ms"]]
+          .mean().round(3).to_string())
+
+
+if __name__ == "__main__":
+    main()
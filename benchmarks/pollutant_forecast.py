@@ -0,0 +1,116 @@
+"""
+Rolled pollutant forecast vs the old Forecast page loop.
+
+The old loop fed the last day's pollutants into the AQI model for every
+day of the horizon. Both are fitted on data before a cutoff and
+forecast from a series of origins after it; prints MAE against the
+recorded daily AQI per horizon day, and the latency of one forecast.
+
+    python benchmarks/pollutant_forecast.py --cities Delhi Mumbai Kolkata --days 14
+"""
+import argparse
+import time
+
+from _common import ROOT_DIR  # noqa: F401  (puts the repo on sys.path)
+
+import numpy as np
+import pandas as pd
+
+import utils
+
+
+def frozen_forecast(reg, start, start_date, days):
+    """The previous page loop: the same pollutants every day."""
+    values, date = [], start_date
+    pm25_lag, pm10_lag = start["PM2.5"], start["PM10"]
+    for _ in range(days):
+        date = date + pd.Timedelta(days=1)
+        X = np.array([[start[col] for col in utils.POLLUTANTS]
+                      + [date.month, date.dayofweek, pm25_lag, pm10_lag]])
+        values.append(reg.predict(X)[0])
+        pm25_lag, pm10_lag = start["PM2.5"], start["PM10"]
+    return np.array(values)
+
+
+def city_report(city, df, days, origins, profile, engine):
+    city_df = df[df["City"] == city]
+    daily = utils.daily_pollutants(city_df).dropna()
+    aqi = utils.daily_aqi(city_df)
+    cutoff = daily.index[int(len(daily) * 0.8)]
+    train = city_df[city_df["Date"] < cutoff]
+
+    reg, _ = utils.fit_city_models(city, train, profile, engine)
+    models = utils.fit_pollutant_models(city, train, profile, engine)
+    if reg is None or models is None:
+        return None
+    if hasattr(reg, "estimators_"):
+        reg = utils.PackedForest(utils.pack_forest(reg))
+        packed = utils.PackedForest(utils.stack_forests(models))
+        X = np.ones((1, len(utils.POLLUTANT_FORECAST_FEATURES)))
+        assert np.allclose(packed.predict(X), np.column_stack([m.predict(X) for m in models]))
+        models = packed
+    forecaster = utils.PollutantForecaster(models)
+
+    test = daily[daily.index >= cutoff]
+    errors = {"frozen": [], "rolled": []}
+    timings = {"frozen": [], "rolled": []}
+    for date in test.index[:-days][::max((len(test) - days) // origins, 1)]:
+        actual = aqi.reindex(pd.date_range(date + pd.Timedelta(days=1), periods=days)).to_numpy()
+        recent = daily.loc[:date]
+        start = recent.iloc[-1]
+
+        t = time.perf_counter()
+        frozen = frozen_forecast(reg, start, date, days)
+        timings["frozen"].append(time.perf_counter() - t)
+
+        t = time.perf_counter()
+        rolled = utils.forecast_city_aqi(reg, forecaster, recent, days)["AQI"].to_numpy()
+        timings["rolled"].append(time.perf_counter() - t)
+
+        errors["frozen"].append(np.abs(frozen - actual))
+        errors["rolled"].append(np.abs(rolled - actual))
+
+    rows = []
+    for name in errors:
+        mae = np.nanmean(np.array(errors[name]), axis=0)
+        rows.append({
+            "city": city, "method": name, "origins": len(errors[name]),
+            "mae_day1": mae[0], "mae_day7": mae[min(6, days - 1)],
+            "mae_last": mae[-1], "mae_mean": mae.mean(),
+            "forecast_ms": np.median(timings[name]) * 1e3,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cities", nargs="+", default=["Delhi", "Mumbai", "Kolkata"])
+    parser.add_argument("--days", type=int, default=14)
+    parser.add_argument("--origins", type=int, default=40)
+    parser.add_argument("--profile", choices=list(utils.MODEL_PROFILES))
+    parser.add_argument("--engine", choices=list(utils.MODEL_ENGINES))
+    args = parser.parse_args()
+
+    df = utils.read_dataset()
+    rows = []
+    for city in args.cities:
+        report = city_report(city, df, args.days, args.origins, args.profile, args.engine)
+        if report is None:
+            print(f"{city}: below the training threshold, skipped")
+            continue
+        rows.extend(report)
+
+    if not rows:
+        return
+
+    table = pd.DataFrame(rows)
+    pd.set_option("display.width", 120)
+    print(table.round(2).to_string(index=False))
+    print()
+    print(table.groupby("method", sort=False)
+          [["mae_day1", "mae_day7", "mae_last", "mae_mean", "forecast_ms"]]
+          .mean().round(2).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Prediction cache under a stream of repeated, slightly noisy queries.
+
+Draws --queries inputs for a city of which --repeat are earlier inputs
+plus sub-precision noise, runs them through utils.predict_aqi and
+reports latency of misses and hits and the cache's hit rate.
+
+    AQI_MODEL_PROFILE=full python benchmarks/prediction_cache.py --city Mumbai
+"""
+import argparse
+import time
+
+from _common import ROOT_DIR  # noqa: F401  (puts the repo on sys.path)
+
+import numpy as np
+
+import utils
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--city", default="Mumbai")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--repeat", type=float, default=0.8)
+    args = parser.parse_args()
+
+    df = utils.load_data()
+    city_df = df[df["City"] == args.city]
+    frame, features = utils.create_features(city_df)
+    rows = frame[features].to_numpy(dtype=float)
+
+    # Build (or load) the models outside the timed loop
+    utils.predict_aqi(args.city, rows[0], df)
+    cache = utils.get_prediction_cache()
+    cache.__init__()
+
+    rng = np.random.default_rng(0)
+    seen, timings = [], {"miss": [], "hit": []}
+    for _ in range(args.queries):
+        if seen and rng.random() < args.repeat:
+            inputs = seen[rng.integers(len(seen))].copy()
+            inputs[:6] += rng.uniform(-0.004, 0.004, 6)
+        else:
+            inputs = rows[rng.integers(len(rows))]
+            seen.append(inputs)
+
+        hits = cache.stats()["hits"]
+        start = time.perf_counter()
+        utils.predict_aqi(args.city, inputs, df)
+        elapsed = time.perf_counter() - start
+        timings["hit" if cache.stats()["hits"] > hits else "miss"].append(elapsed)
+
+    for name, values in timings.items():
+        if values:
+            print(f"{name:>4}: {len(values):5d} queries, median {np.median(values) * 1e6:9.1f} us")
+    print(cache.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Resident memory against the number of concurrent sessions.
+
+Runs N AppTest sessions at once, each rerunning the pages that load the
+dataset, and reports the peak RSS above a warmed-up single session.
+"copy" hands every load_data() call a deep copy, as @st.cache_data
+does; "shared" is the frozen process-wide frame load_data() returns.
+--scale replicates the bundled CSV to stand in for a larger dataset.
+Each measurement runs in a fresh subprocess.
+
+    python benchmarks/session_memory.py --sessions 1 4 16 --scale 8
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+
+from _common import ROOT_DIR, rss_mb
+
+import pandas as pd
+
+PAGES = ["pages/2_Manual_Prediction.py", "pages/3_Historical_vs_Live.py", "pages/4_Forecast.py"]
+
+
+def _sample_peak(stop, peak, interval=0.01):
+    """Highest RSS seen until stop is set (VmHWM cannot be reset everywhere)."""
+    while not stop.wait(interval):
+        peak[0] = max(peak[0], rss_mb())
+
+
+def _child(mode, sessions, path, rounds):
+    from streamlit.testing.v1 import AppTest
+    import utils
+
+    # Point the app at the replicated file, keeping its manifest out of cache/
+    utils._file_stamp.__defaults__ = (path,)
+    utils.read_dataset.__defaults__ = (path,)
+    utils.DATA_MANIFEST_PATH = os.path.join(os.path.dirname(path), "manifest.json")
+
+    if mode == "copy":
+        shared_load = utils.load_data
+        utils.load_data = lambda: shared_load().copy(deep=True)
+
+    def session():
+        for _ in range(rounds):
+            for page in PAGES:
+                AppTest.from_file(os.path.join(ROOT_DIR, page), default_timeout=300).run()
+
+    session()
+    frame_mb = utils.load_data().memory_usage(deep=True).sum() / 1e6
+    base = rss_mb()
+    stop, peak = threading.Event(), [base]
+    sampler = threading.Thread(target=_sample_peak, args=(stop, peak))
+    sampler.start()
+
+    threads = [threading.Thread(target=session) for _ in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stop.set()
+    sampler.join()
+
+    return {"frame_mb": frame_mb, "peak_mb": peak[0] - base, "after_mb": rss_mb() - base}
+
+
+def _run(mode, sessions, path, rounds):
+    out = subprocess.run(
+        [sys.executable, __file__, "--child", mode, str(sessions), path, "--rounds", str(rounds)],
+        check=True, capture_output=True, text=True, cwd=ROOT_DIR
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--scale", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=2)
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        mode, sessions, path = args.child
+        print(json.dumps(_child(mode, int(sessions), path, args.rounds)))
+        return
+
+    import utils
+    base = pd.read_csv(utils.DATA_PATH)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"x{args.scale}.csv")
+        pd.concat([base] * args.scale, ignore_index=True).to_csv(path, index=False)
+
+        print(f"{'sessions':>8} {'mode':>7} {'frame MB':>9} {'peak +MB':>9} {'after +MB':>10}")
+        for sessions in args.sessions:
+            for mode in ("copy", "shared"):
+                result = _run(mode, sessions, path, args.rounds)
+                print(f"{sessions:>8} {mode:>7} {result['frame_mb']:>9.1f} "
+                      f"{result['peak_mb']:>9.1f} {result['after_mb']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
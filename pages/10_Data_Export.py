@@ -0,0 +1,62 @@
+import time
+import streamlit as st
+from utils import export_bytes, get_catalog, catalog_cities, load_data, apply_theme
+from utils import EXPORT_FORMATS, FEATURE_EXPORT_COLUMNS, SCORING_COLUMNS
+
+st.set_page_config(page_title="Data Export", layout="centered")
+
+apply_theme()
+
+st.title("📤 Data Export")
+
+st.markdown("""
+Download the cleaned history, the model features or batch predictions
+as an **Arrow IPC stream** or a **Parquet** file, limited to the city,
+dates and columns you need. The same exports are available from
+`python scripts/export_data.py`.
+""")
+
+KINDS = {
+    "Cleaned history": ("dataset", list(load_data().columns)),
+    "Model features": ("features", FEATURE_EXPORT_COLUMNS),
+    "Predictions": ("predictions", SCORING_COLUMNS + ["Predicted_AQI", "Predicted_Bucket", "Imputed"]),
+}
+
+label = st.selectbox("Export", list(KINDS))
+kind, all_columns = KINDS[label]
+
+all_cities = "All cities"
+city_options = catalog_cities("model") if kind == "predictions" else [all_cities] + catalog_cities()
+city = st.selectbox("City", city_options)
+city = None if city == all_cities else city
+
+cities = get_catalog()["cities"]
+spans = [cities[city]] if city else list(cities.values())
+first_day = min(span["first_date"] for span in spans)
+last_day = max(span["last_date"] for span in spans)
+
+col1, col2 = st.columns(2)
+start = col1.date_input("From", value=first_day, min_value=first_day, max_value=last_day)
+end = col2.date_input("To", value=last_day, min_value=first_day, max_value=last_day)
+
+columns = st.multiselect("Columns", all_columns, default=all_columns)
+fmt = st.radio("Format", list(EXPORT_FORMATS), horizontal=True,
+               format_func={"arrow": "Arrow IPC stream", "parquet": "Parquet"}.get)
+
+if st.button("Prepare export"):
+    if not columns:
+        st.error("Select at least one column.")
+        st.stop()
+
+    with st.spinner("Preparing export..."):
+        start_time = time.perf_counter()
+        data = export_bytes(kind, fmt, city=city, start=start, end=end, columns=columns)
+        elapsed = time.perf_counter() - start_time
+
+    st.caption(f"{len(data) / 1e6:.2f} MB prepared in {elapsed * 1000:.0f} ms")
+    st.download_button(
+        "⬇️ Download",
+        data,
+        file_name=f"{kind}_{city or 'all'}_{start}_{end}{EXPORT_FORMATS[fmt]}",
+        mime="application/vnd.apache.arrow.stream" if fmt == "arrow" else "application/octet-stream"
+    )
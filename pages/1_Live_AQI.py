@@ -1,7 +1,8 @@
 import streamlit as st
 import pandas as pd
 from utils import fetch_live_aqi, predict_aqi, aqi_style, health_tip, get_settings
-from utils import apply_theme
+from utils import apply_theme, load_data, show_build_status, describe_age
+from utils import live_features, aqi_bucket, catalog_cities, normalize_city
 
 # ------------- PAGE CONFIG ----------------
 st.set_page_config(
@@ -21,13 +22,9 @@ city_input = st.text_input(
     "Delhi"
 )
 
-@st.cache_data()
-def load_data():
-    return pd.read_csv("data/cleaned_station_day_with_station_info.csv",
-                       parse_dates=["Date"])
 df = load_data()
 
-cities = sorted(df["City"].unique())
+model_cities = catalog_cities("model")
 
 if st.button("🚀 Fetch Live AQI"):
     with st.spinner("Fetching live data..."):
@@ -48,23 +45,15 @@ if st.button("🚀 Fetch Live AQI"):
 
         st.subheader(f"📍 Live AQI for {city_input.title()}")
 
-        color, emoji = aqi_style(
-            "Good" if aqi_live <= 50 else
-            "Satisfactory" if aqi_live <= 100 else
-            "Moderate" if aqi_live <= 200 else
-            "Poor" if aqi_live <= 300 else
-            "Very Poor" if aqi_live <= 400 else
-            "Severe"
-        )
+        if live_data["stale"]:
+            st.warning(f"Showing the reading from {describe_age(live_data['age_seconds'])} ago "
+                       "while a fresh one is fetched.")
 
-        h_tip = health_tip(
-            "Good" if aqi_live <= 50 else
-            "Satisfactory" if aqi_live <= 100 else
-            "Moderate" if aqi_live <= 200 else
-            "Poor" if aqi_live <= 300 else
-            "Very Poor" if aqi_live <= 400 else
-            "Severe"
-        )
+        live_bucket = aqi_bucket(aqi_live)
+
+        color, emoji = aqi_style(live_bucket)
+
+        h_tip = health_tip(live_bucket)
         
         st.markdown(
             f"""
@@ -96,25 +85,30 @@ if st.button("🚀 Fetch Live AQI"):
         st.write(f"O₃: {o3_live}")
 
         # 🚀 Optional: Compare with your model’s prediction
-        try:
-            predicted_value, predicted_cat = predict_aqi(
-                city_input.title(),
-                [
-                    pm25_live, pm10_live,
-                    no2_live, so2_live,
-                    co_live, o3_live,
-                    live_data["AQI"] % 12 + 1,  # simple proxy for month/day
-                    0,
-                    pm25_live,
-                    pm10_live
-                ],
-                df
-            )
-
-            st.write("---")
-            st.info(f"📊 Model Predicted AQI: {predicted_value}")
-            st.info(f"📊 Model Predicted Category: {predicted_cat}")
-        except Exception as e:
-            st.warning("Model prediction unavailable for this city.")
-            st.error(f"Debug info: {e}")
+        # Only cities in the dataset can have a model; anything else typed
+        # here would just queue a build that can never succeed
+        city = normalize_city(city_input)
+        st.write("---")
+        if city not in model_cities:
+            st.caption("No model is trained for this city, so only the live reading is shown.")
+        else:
+            try:
+                features, imputed = live_features(city, live_data)
+                predicted_value, predicted_cat = predict_aqi(
+                    city,
+                    features,
+                    df,
+                    wait=False
+                )
 
+                if predicted_value is None:
+                    show_build_status(city)
+                else:
+                    st.info(f"📊 Model Predicted AQI: {predicted_value}")
+                    st.info(f"📊 Model Predicted Category: {predicted_cat}")
+                    if imputed:
+                        st.caption(f"Not reported live, filled with typical values for this "
+                                   f"city and month: {', '.join(imputed)}")
+            except Exception as e:
+                st.warning("Model prediction unavailable for this city.")
+                st.error(f"Debug info: {e}")
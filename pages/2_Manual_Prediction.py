@@ -1,7 +1,8 @@
 import streamlit as st
 import pandas as pd
 import datetime
-from utils import predict_aqi, aqi_style, health_tip, get_settings, apply_theme
+from utils import explain_aqi, aqi_style, health_tip, get_settings, apply_theme, load_data
+from utils import show_build_status, catalog_cities
 
 
 st.set_page_config(page_title="Manual AQI Prediction", layout="centered")
@@ -10,13 +11,9 @@ apply_theme()
 
 st.title("🧪 Manual AQI Prediction")
 
-@st.cache_data()
-def load_data():
-    return pd.read_csv("data/cleaned_station_day_with_station_info.csv",
-                       parse_dates=["Date"])
 df = load_data()
 
-cities = sorted(df["City"].unique())
+cities = catalog_cities()
 
 city = st.selectbox("Select City", cities)
 
@@ -60,10 +57,10 @@ if st.button("🔍 Predict AQI"):
         inputs = [PM25, PM10, NO2, SO2, CO, O3,
                 month, dayofweek, PM25_lag1, PM10_lag1]
 
-        aqi, category = predict_aqi(city, inputs, df)
+        aqi, category, baseline, contributions = explain_aqi(city, inputs, df, wait=False)
         
         if aqi is None:
-            st.error("Not enough data to train model for this city.")
+            show_build_status(city)
         else:
             color, emoji = aqi_style(category)
         
@@ -90,6 +87,18 @@ if st.button("🔍 Predict AQI"):
             if st.session_state.get("health_alerts", True):
                 st.info(health_tip(category))
 
+            if contributions is not None:
+                st.markdown("### 🧩 Why this AQI?")
+                st.caption(
+                    f"Starting from the {city} model's average of {baseline:.1f}, "
+                    "each input pushes the prediction up or down by the amount shown."
+                )
+                st.bar_chart(
+                    pd.Series(contributions, name="AQI contribution")
+                    .sort_values(key=abs, ascending=False),
+                    horizontal=True
+                )
+
         
     except Exception as e:
             st.error(str(e))
@@ -1,24 +1,30 @@
 import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
-from utils import fetch_live_aqi, get_city_history, get_settings, apply_theme
+from utils import fetch_live_aqi, city_history_chart, get_settings, apply_theme, load_data
+from utils import describe_age, catalog_cities
 import plotly.graph_objects as go
 
 apply_theme()
 
 st.title("📊 Historical vs Live AQI Comparison")
 
-@st.cache_data
-def load_data():
-    return pd.read_csv("data/station_day_with_station_info.csv", parse_dates=["Date"])
-
 df = load_data()
 
-cities = sorted(df["City"].unique())
+cities = catalog_cities()
 city = st.selectbox("Select City", cities)
 
+# Full-range series: its last point is the latest reading and its ends
+# bound the zoom slider
+full_history = city_history_chart(city)
+first_day = full_history["Date"].iloc[0].date()
+last_day = full_history["Date"].iloc[-1].date()
+
+zoom = st.slider("Date range", first_day, last_day, (first_day, last_day),
+                 format="YYYY-MM-DD")
+
 if st.button("Compare"):
-    history = get_city_history(df, city)
+    history = city_history_chart(city, *zoom)
     live = fetch_live_aqi(city)
 
     if not live:
@@ -28,9 +34,13 @@ if st.button("Compare"):
 
         st.subheader(f" 📍 {city}")
 
+        if live["stale"]:
+            st.warning(f"Showing the reading from {describe_age(live['age_seconds'])} ago "
+                       "while a fresh one is fetched.")
+
         col1, col2 = st.columns(2)
         col1.metric("Live AQI", live_aqi)
-        col2.metric("Last Historical AQI", round(history["AQI"].iloc[-1], 1))
+        col2.metric("Last Historical AQI", round(full_history["AQI"].iloc[-1], 1))
 
         fig = go.Figure()
 
@@ -45,7 +55,7 @@ if st.button("Compare"):
 
         #Live point
         fig.add_trace(go.Scatter(
-            x=[history["Date"].iloc[-1]],
+            x=[full_history["Date"].iloc[-1]],
             y=[live_aqi],
             mode="markers",
             marker=dict(size=12, color="red"),
@@ -1,21 +1,16 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-from utils import train_city_models, get_settings, apply_theme
+from utils import get_city_models, show_build_status, get_settings, apply_theme, load_data
+from utils import run_compute, live_seed, catalog_cities, forecast_chart
+from utils import get_pollutant_models, daily_pollutants, forecast_city_aqi, query_data
 
 st.set_page_config(page_title="AQI Forecast", layout="centered")
 st.title("🔮 AQI Forecast Using Historical Data")
 
 apply_theme()
 
-@st.cache_data
-def load_data():
-    return pd.read_csv("data/cleaned_station_day_with_station_info.csv", parse_dates=["Date"])
-
 df = load_data()
 
-cities = sorted(df["City"].unique())
+cities = catalog_cities()
 city = st.selectbox("Select City", cities)
 
 default_days = st.session_state.get("forecast_days", 7)
@@ -23,78 +18,49 @@ days = st.slider("Forecast Days", 3, 14, default_days)
 
 
 if st.button("Generate Forecast"):
-    city_df = df[df["City"] == city].sort_values("Date").copy()
+    # A date-ordered view of the shared dataset, not a copy
+    city_df = query_data(city)
 
     if len(city_df) < 50:
         st.error("Not enough data for this city.")
     else:
-        models = train_city_models(city, df)
-
-        if models == (None, None):
-            st.error("Model unavailable for this city.")
+        # Both builds are queued at once, so a cold city waits for them together
+        state, models = get_city_models(city, df)
+        pollutant_state, forecaster = get_pollutant_models(city, df)
+
+        if state != "ready":
+            show_build_status(city)
+        elif pollutant_state != "ready":
+            show_build_status(city, "pollutants")
         else:
             reg, _ = models
 
-            history = city_df.tail(30)
-            aqi_series = list(city_df["AQI"].values)
-
-            last_row = city_df.iloc[-1]
-            pm25_lag = last_row["PM2.5"]
-            pm10_lag = last_row["PM10"]
-
-            forecast_values = []
-            forecast_dates = []
-
-            current_date = city_df["Date"].iloc[-1]
-
-            for _ in range(days):
-                next_date = current_date + pd.Timedelta(days=1)
-
-                month = next_date.month
-                dow = next_date.dayofweek
-
-                X = [
-                    last_row["PM2.5"],
-                    last_row["PM10"],
-                    last_row["NO2"],
-                    last_row["SO2"],
-                    last_row["CO"],
-                    last_row["O3"],
-                    month,
-                    dow,
-                    pm25_lag,
-                    pm10_lag
-                ]
-
-                X = np.array(X).reshape(1, -1)
-                next_aqi = reg.predict(X)[0]
-
-                forecast_values.append(next_aqi)
-                forecast_dates.append(next_date)
-
-                pm25_lag = last_row["PM2.5"]
-                pm10_lag = last_row["PM10"]
-                current_date = next_date
-
-    
-
-            # Plot
-            fig, ax = plt.subplots(figsize=(10, 4))
-            ax.plot(history["Date"], history["AQI"], label="Historical")
-            ax.plot(forecast_dates, forecast_values, marker="o", label="Forecast")
-
-            ax.set_title(f"{city} AQI Forecast")
-            ax.set_xlabel("Date")
-            ax.set_ylabel("AQI")
-            ax.legend()
-            show_grid = st.session_state.get("show_grid", True)
-            ax.grid(show_grid)
-
-            st.pyplot(fig)
+            seed = live_seed(city)
+
+            if seed is not None:
+                # Start from recent live readings rather than the end of the dataset
+                st.caption("Starting from recent live readings.")
+                history = seed["history"]
+                recent = seed["pollutants"]
+            else:
+                history = city_df.tail(30)
+                recent = daily_pollutants(city_df).dropna()
+
+            # Pollutants are rolled forward day by day, then the AQI of
+            # the whole horizon is predicted in one batch
+            forecast = run_compute(forecast_city_aqi, reg, forecaster, recent, days)
+
+            # Plot (rendered once per distinct chart and shared across sessions)
+            st.image(forecast_chart(
+                city,
+                history,
+                forecast[["Date", "AQI"]],
+                st.session_state.get("theme", "Light"),
+                st.session_state.get("show_grid", True)
+            ))
 
             with st.expander("📅 Forecast Table"):
-                table_df = pd.DataFrame({
-                    "Date": forecast_dates,
-                    "Predicted AQI": [round(x, 1) for x in forecast_values]
-                })
-                st.dataframe(table_df)
+                table_df = forecast.round({col: 1 for col in forecast.columns[1:]})
+                table_df = table_df.rename(columns={"AQI": "Predicted AQI"})
+                table_df["Date"] = table_df["Date"].dt.date
+                st.dataframe(table_df, hide_index=True)
@@ -1,7 +1,8 @@
 import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
-from utils import get_settings, apply_theme
+from utils import get_settings, apply_theme, load_data, compact_dataset
+from utils import DateIndex, get_date_index, get_catalog, get_data_manifest, cached_chart
 
 apply_theme()
 
@@ -10,16 +11,21 @@ st.set_page_config(page_title="Visualization", layout="centered")
 st.title("Air Quality Visualization Dashboard")
 data_vis_choice = st.selectbox("Which data would you like to visualize?", ("Historical data", "Custom data"))
 if data_vis_choice == "Historical data":
-    data = "data/station_day_with_station_info.csv"
+    df = load_data()
+    date_index = get_date_index()
+    data_key = get_data_manifest()["version"]
 else:
     uploaded_file = st.file_uploader("Upload Air Quality Data")
     if uploaded_file is None:
         st.write("No file uploaded yet...")
         st.stop()
     st.write(f"Thank you for uploading {uploaded_file.name} !")
-    data = uploaded_file
+    df = compact_dataset(pd.read_csv(uploaded_file, parse_dates=["Date"]))
+    # Without a City column there are no city blocks to index; the
+    # monthly charts then filter the uploaded rows by date directly
+    date_index = DateIndex(df) if "City" in df.columns else None
+    data_key = ("upload", uploaded_file.file_id)
 
-df = pd.read_csv(data)
 # df = df.dropna()
 st.write(df)
 st.write("---")
@@ -27,18 +33,31 @@ st.write("---")
 
 
 st.write("""### View The Average AQI for Each Month""")
-df['Date'] = pd.to_datetime(df['Date'])
-df['Month_Year'] = df['Date'].dt.to_period('M')
 
-monthly_aqi = df.groupby('Month_Year')['AQI'].mean().reset_index(name="monthly_avg")
-print(monthly_aqi.columns)
-monthly_aqi["Month_Year"] = monthly_aqi["Month_Year"].dt.to_timestamp()
+def monthly_means(columns, start, end):
+    """
+    Monthly averages of columns over the months from start to end. Only
+    the rows in range are read (binary search on the date index), so a
+    slider move costs the same however long the history is.
+    """
+    end = end + pd.offsets.MonthEnd(0)
+    if date_index is None:
+        window = df.loc[df["Date"].between(start, end), ["Date"] + columns]
+    else:
+        window = date_index.query(start=start, end=end, columns=["Date"] + columns)
+    # Group by a derived key instead of adding columns: window is a view of df
+    month_year = window['Date'].dt.to_period('M').dt.to_timestamp().rename('Month_Year')
+    return window.groupby(month_year)[columns].mean().sort_index()
 
 
 # Slider for filtering years
 # Finding the min and max dates
-min_date = monthly_aqi["Month_Year"].min().to_pydatetime()
-max_date = monthly_aqi["Month_Year"].max().to_pydatetime()
+if date_index is None:
+    first_day, last_day = df["Date"].min(), df["Date"].max()
+else:
+    first_day, last_day = date_index.date_span()
+min_date = first_day.to_period('M').to_timestamp().to_pydatetime()
+max_date = last_day.to_period('M').to_timestamp().to_pydatetime()
 
 # Create a date range slider in Streamlit
 start_date, end_date = st.slider(
@@ -49,14 +68,15 @@ start_date, end_date = st.slider(
     format="YYYY-MM"
 )
 
-# Filter the dataframe based on the slider
-filtered_df = monthly_aqi[
-    (monthly_aqi["Month_Year"] >= start_date) &
-    (monthly_aqi["Month_Year"] <= end_date)
-    ]
+# Average only the months in the slider range; chart data is cached per
+# data version and range, so unrelated widget changes reuse it
+filtered_df = cached_chart(
+    ("monthly", data_key, ("AQI",), start_date, end_date),
+    lambda: monthly_means(["AQI"], pd.Timestamp(start_date), pd.Timestamp(end_date))
+)
 
 # Create the line_chart based on the filtered dataframe
-st.line_chart(filtered_df.set_index("Month_Year")["monthly_avg"])
+st.line_chart(filtered_df["AQI"].rename("monthly_avg"))
 
 
 st.write("---") # Separate different section with a line
@@ -66,28 +86,13 @@ st.write("---") # Separate different section with a line
 st.write("""### View The Average pollutant value for Each Month""")
 # 1. Convert Month_Year to datetime
 # --- POLLUTANTS MONTHLY DATA ---
-pollutant_df = df.copy()
-
 pollutants = [
     'PM2.5', 'PM10', 'NO', 'NO2', 'NOx',
      'NH3', 'CO', 'SO2', 'O3', 'Benzene', 'Toluene'
 ]
-# pollutant_df["Month_Year"] = pd.to_datetime(pollutant_df["Month_Year"], format="%Y-%m")
-
-pollutant_df["Month_Year"] = pollutant_df["Month_Year"].dt.to_timestamp()
-
-monthly_pollutants = (
-    pollutant_df
-    .groupby("Month_Year")[pollutants]
-    .mean()
-    .sort_index()
-)
-
+pollutants = [p for p in pollutants if p in df.columns]
 
-min_p, max_p = (
-    monthly_pollutants.index.min().to_pydatetime(),
-    monthly_pollutants.index.max().to_pydatetime()
-)
+min_p, max_p = min_date, max_date
 
 # Create a drodown menu to choose to view ALL pollutants at once or an individual pollutant
 pollutant_options = ["ALL"] + pollutants
@@ -109,7 +114,10 @@ p_start, p_end = st.slider(
     key="pollutant_slider"  # IMPORTANT
 )
 
-filtered_pollutants = monthly_pollutants.loc[p_start:p_end]
+filtered_pollutants = cached_chart(
+    ("monthly", data_key, tuple(pollutants), p_start, p_end),
+    lambda: monthly_means(pollutants, pd.Timestamp(p_start), pd.Timestamp(p_end))
+)
 
 #Create a condition to plot on a line_chart, whatever the user chooses
 if selected_pollutant == "ALL":
@@ -126,13 +134,12 @@ st.write("---") # Separate different section with a line
 
 #"""CREATE A BAR CHART SHOWING THE FREQUENCY OF AIR QUALITIES IN THE AQI BUCKET"""
 st.write("""### View how many times the air quality in your dataset was actually severe, moderate...""")
-bar_plot = df.copy()
-aqi_counts = (
-    bar_plot["AQI_Bucket"]
+aqi_counts = cached_chart(("buckets", data_key), lambda: (
+    df["AQI_Bucket"]
     .value_counts()
     .sort_index()  # keeps logical bucket order if labels are sortable
     .to_frame(name="Count")
-)
+))
 
 st.bar_chart(aqi_counts)
 
@@ -141,6 +148,17 @@ st.write("---")
 
 
 #""" CREATING A BAR CHART TO VIEW AVERAGE AQI BY STATE"""
-st.write("""### View Average AQI by State""")
-state_aqi = df.groupby('State')['AQI'].mean().sort_values(ascending=False).to_frame(name="State AQI")
-st.bar_chart(state_aqi)
+if "State" in df.columns:
+    st.write("""### View Average AQI by State""")
+
+    def average_by_state():
+        if data_vis_choice == "Historical data":
+            # From the catalog's per-city AQI totals instead of the raw rows
+            catalog = pd.DataFrame.from_dict(get_catalog()["cities"], orient="index")
+            totals = catalog.groupby("state")[["aqi_sum", "aqi_count"]].sum()
+            state_aqi = (totals["aqi_sum"] / totals["aqi_count"]).rename_axis("State")
+        else:
+            state_aqi = df.groupby('State', observed=True)['AQI'].mean()
+        return state_aqi.sort_values(ascending=False).to_frame(name="State AQI")
+
+    st.bar_chart(cached_chart(("states", data_key), average_by_state))
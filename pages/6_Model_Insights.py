@@ -1,5 +1,10 @@
+import os
+import pandas as pd
 import streamlit as st
 from utils import get_settings, apply_theme
+from utils import load_backtests, BACKTEST_CITY_PATH, FEATURES
+from utils import load_feature_importances, national_importances, FEATURE_IMPORTANCE_PATH
+from utils import outdated_cities
 
 st.set_page_config(page_title="Insights", layout="centered")
 apply_theme()
@@ -22,3 +27,98 @@ st.markdown("""
 - Time-based train/test split
 - Feature engineering (lags, seasonality)
 """)
+
+st.divider()
+st.subheader("🧭 Feature Importance")
+
+@st.cache_data
+def load_importance_table(mtime):
+    return load_feature_importances()
+
+mtime = os.path.getmtime(FEATURE_IMPORTANCE_PATH) if os.path.exists(FEATURE_IMPORTANCE_PATH) else None
+importances = load_importance_table(mtime)
+
+if importances is None:
+    st.info("No feature importances yet. Run `python scripts/build_importances.py` to compute them.")
+else:
+    model_label = st.radio("Model", ["AQI regressor", "Bucket classifier"], horizontal=True)
+    model = "reg" if model_label == "AQI regressor" else "clf"
+    st.caption(
+        "Permutation importance is the increase in MAE (regressor) or drop in "
+        "accuracy (classifier) on the held-out 20% when a feature is shuffled."
+    )
+
+    outdated = outdated_cities(importances)
+    if outdated:
+        st.warning(
+            f"The data for {', '.join(outdated)} changed since these importances were "
+            "computed. Rerun `python scripts/build_importances.py` to refresh them."
+        )
+
+    st.markdown("#### National")
+    st.bar_chart(national_importances(importances, model))
+
+    importance_cities = sorted(importances["city"].unique())
+    importance_city = st.selectbox("City", importance_cities, key="importance_city")
+    city_importances = (
+        importances[(importances["city"] == importance_city) & (importances["model"] == model)]
+        .set_index("feature")[["impurity", "permutation"]]
+        .reindex(FEATURES)
+    )
+    st.markdown(f"#### {importance_city}")
+    st.bar_chart(city_importances)
+
+st.divider()
+st.subheader("📈 Backtest Results")
+
+@st.cache_data
+def load_backtest_tables(mtime):
+    return load_backtests()
+
+mtime = os.path.getmtime(BACKTEST_CITY_PATH) if os.path.exists(BACKTEST_CITY_PATH) else None
+city_table, horizon_table = load_backtest_tables(mtime)
+
+if city_table is None:
+    st.info("No backtest results yet. Run `python scripts/backtest.py` to generate them.")
+    st.stop()
+
+st.markdown("""
+Rolling-origin evaluation: each fold trains on all data before its cutoff
+and is scored on the period up to the next cutoff.
+""")
+
+city_summary = (
+    city_table
+    .groupby("city")
+    .agg(folds=("fold", "count"), mae=("mae", "mean"),
+         bucket_accuracy=("bucket_accuracy", "mean"))
+    .sort_values("mae")
+)
+
+st.markdown("#### City models: AQI error by city")
+st.bar_chart(city_summary["mae"])
+
+with st.expander("📋 Per-city table"):
+    st.dataframe(city_summary.round(3))
+
+st.markdown("#### Forecast page: AQI error by horizon")
+st.caption(
+    "The served forecast, pollutants rolled forward day by day and fed to "
+    "the city AQI model, started from every complete day of each fold."
+)
+horizon_table["abs_error"] = horizon_table["mae"] * horizon_table["n"]
+national = horizon_table.groupby("horizon")[["abs_error", "n"]].sum()
+horizon_mae = (national["abs_error"] / national["n"]).rename("National")
+
+forecast_cities = sorted(horizon_table["city"].unique())
+selected = st.selectbox("Compare with city", ["None"] + forecast_cities)
+
+if selected != "None":
+    city_rows = horizon_table[horizon_table["city"] == selected]
+    city_rows = city_rows.groupby("horizon")[["abs_error", "n"]].sum()
+    horizon_mae = pd.concat(
+        [horizon_mae, (city_rows["abs_error"] / city_rows["n"]).rename(selected)],
+        axis=1
+    )
+
+st.line_chart(horizon_mae)
@@ -0,0 +1,66 @@
+import os
+import tempfile
+import time
+import streamlit as st
+from utils import score_csv, load_data, get_settings, apply_theme, SCORING_COLUMNS
+
+st.set_page_config(page_title="Bulk Scoring", layout="centered")
+
+apply_theme()
+
+st.title("📦 Bulk AQI Scoring")
+
+st.markdown(f"""
+Upload a station export to score every row with the city models.
+The file needs the columns **{", ".join(SCORING_COLUMNS)}**, with each
+city's rows in date order.
+""")
+
+df = load_data()
+
+uploaded_file = st.file_uploader("Upload CSV", type=["csv"])
+chunksize = st.select_slider("Rows per chunk", [10_000, 25_000, 50_000, 100_000], 50_000)
+explain = st.checkbox("Add per-feature contributions",
+                      help="Baseline_AQI plus one Contribution_ column per model feature")
+
+if uploaded_file is not None and st.button("🚀 Score File"):
+    progress = st.progress(0.0, text="Starting...")
+    rate = st.empty()
+
+    # Scored chunks go straight to a temporary file, so memory stays at
+    # about one chunk regardless of the upload size
+    out = tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False, newline="")
+    total_bytes = uploaded_file.size or 1
+    start, rows = time.perf_counter(), 0
+
+    try:
+        with out:
+            for i, chunk in enumerate(score_csv(uploaded_file, df, chunksize, explain)):
+                chunk.to_csv(out, index=False, header=(i == 0))
+                if i == 0:
+                    preview = chunk.head(20)
+                rows += len(chunk)
+                elapsed = time.perf_counter() - start
+                progress.progress(min(uploaded_file.tell() / total_bytes, 1.0),
+                                  text=f"{rows:,} rows scored")
+                rate.metric("Rows per second", f"{rows / elapsed:,.0f}")
+
+        # st.download_button holds the bytes anyway, so read them back
+        # and never leave the scored file behind, whatever fails
+        with open(out.name, "rb") as fh:
+            scored = fh.read()
+    except ValueError as e:
+        st.error(str(e))
+        st.stop()
+    finally:
+        os.remove(out.name)
+
+    progress.progress(1.0, text=f"Done: {rows:,} rows in {time.perf_counter() - start:.1f}s")
+    st.dataframe(preview)
+
+    st.download_button(
+        "⬇️ Download scored CSV",
+        scored,
+        file_name=f"scored_{uploaded_file.name}",
+        mime="text/csv"
+    )
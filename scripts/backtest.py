@@ -0,0 +1,41 @@
+"""
+Rolling-origin backtest of the city models and the Forecast page's
+rolled pollutant forecast. Writes the per-city and per-horizon error
+tables read by the Model Insights page.
+
+    python scripts/backtest.py --folds 5 --horizon 14 --profile compact
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cities", nargs="+")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--horizon", type=int, default=14)
+    parser.add_argument("--engine", choices=list(utils.MODEL_ENGINES))
+    parser.add_argument("--profile", choices=list(utils.MODEL_PROFILES))
+    parser.add_argument("--jobs", type=int, help="processes (default: AQI_COMPUTE_WORKERS)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    city_table, horizon_table = utils.run_backtests(
+        utils.read_dataset(), args.cities, args.folds, args.horizon,
+        args.profile, args.engine, args.jobs
+    )
+    utils.save_backtests(city_table, horizon_table)
+
+    print(f"Backtested {city_table['city'].nunique()} city models and "
+          f"{horizon_table['city'].nunique()} city forecasts in "
+          f"{time.perf_counter() - start:.1f}s -> {utils.REPORT_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Compute impurity and permutation feature importances for every city
+model and store them for the Model Insights page. City models that are
+not built yet are trained first, in parallel.
+
+    python scripts/build_importances.py --repeats 5
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cities", nargs="+")
+    parser.add_argument("--engine", choices=list(utils.MODEL_ENGINES))
+    parser.add_argument("--profile", choices=list(utils.MODEL_PROFILES))
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--jobs", type=int, help="processes (default: AQI_COMPUTE_WORKERS)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    table = utils.build_feature_importances(
+        utils.read_dataset(), args.cities, args.profile, args.engine,
+        args.repeats, args.jobs
+    )
+    utils.save_feature_importances(table)
+
+    print(f"Importances for {table['city'].nunique()} cities in "
+          f"{time.perf_counter() - start:.1f}s -> {utils.FEATURE_IMPORTANCE_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Export the cleaned history, model features or batch predictions as an
+Arrow IPC stream or a Parquet file, optionally limited to one city, a
+date range and a set of columns.
+
+    python scripts/export_data.py features delhi_features.parquet --city Delhi --format parquet
+    python scripts/export_data.py dataset 2019.arrows --start 2019-01-01 --end 2019-12-31 --columns Date City AQI
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("kind", choices=utils.EXPORT_KINDS)
+    parser.add_argument("output")
+    parser.add_argument("--city")
+    parser.add_argument("--start")
+    parser.add_argument("--end")
+    parser.add_argument("--columns", nargs="+")
+    parser.add_argument("--format", choices=list(utils.EXPORT_FORMATS), default="arrow")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    table = utils.export_table(args.kind, args.city, args.start, args.end, args.columns)
+    utils.write_export(table, args.output, args.format)
+    print(f"Wrote {table.num_rows:,} rows to {args.output} "
+          f"in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Roll an hourly station export up to daily city rows without loading it
+whole, optionally writing the combined daily dataset and training the
+city models from it one city at a time.
+
+The input needs the columns Datetime, City, PM2.5, PM10, NO2, SO2, CO, O3
+and AQI.
+
+    python scripts/rollup_hourly.py station_hour.csv --output city_day.csv --train
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("input")
+    parser.add_argument("--output", help="write the combined daily dataset here")
+    parser.add_argument("--chunksize", type=int, default=1_000_000)
+    parser.add_argument("--train", action="store_true")
+    parser.add_argument("--engine", choices=list(utils.MODEL_ENGINES))
+    parser.add_argument("--profile", choices=list(utils.MODEL_PROFILES))
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    manifest = utils.rollup_hourly(args.input, chunksize=args.chunksize)
+    print(f"Rolled up {len(manifest['partitions'])} cities to {utils.ROLLUP_DIR} "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    if args.output:
+        utils.write_rollup_dataset(manifest, args.output)
+        print(f"Wrote {args.output}")
+
+    if args.train:
+        saved = utils.train_rollup_models(manifest, profile=args.profile, engine=args.engine)
+        print(f"Saved {len(saved)} city models to {utils.MODEL_DIR}")
+
+
+if __name__ == "__main__":
+    main()
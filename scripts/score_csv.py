@@ -0,0 +1,44 @@
+"""
+Score a station export with the city models, streaming chunk by chunk.
+
+The input needs the columns Date, City, PM2.5, PM10, NO2, SO2, CO and
+O3, with each city's rows in date order. The output is the input plus
+Predicted_AQI and Predicted_Bucket; --explain also adds Baseline_AQI
+and a Contribution_<feature> column per model feature.
+
+    python scripts/score_csv.py stations.csv scored.csv --chunksize 50000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    parser.add_argument("--explain", action="store_true")
+    args = parser.parse_args()
+
+    df = utils.load_data()
+    start, rows = time.perf_counter(), 0
+
+    with open(args.output, "w", newline="") as out:
+        for i, chunk in enumerate(utils.score_csv(args.input, df, args.chunksize, args.explain)):
+            chunk.to_csv(out, index=False, header=(i == 0))
+            rows += len(chunk)
+            elapsed = time.perf_counter() - start
+            print(f"\r{rows:,} rows scored ({rows / elapsed:,.0f} rows/s)",
+                  end="", file=sys.stderr, flush=True)
+
+    print(file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""
+Fit and save the per-city forecast models read by load_forecast_model.
+
+    python scripts/train_forecast_models.py --engine hist_gradient_boosting
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cities", nargs="+")
+    parser.add_argument("--engine", choices=list(utils.MODEL_ENGINES))
+    parser.add_argument("--profile", choices=list(utils.MODEL_PROFILES))
+    args = parser.parse_args()
+
+    saved = utils.train_forecast_models(
+        utils.read_dataset(), args.cities, args.profile, args.engine
+    )
+    print(f"Saved {len(saved)} forecast models to {utils.FORECAST_MODEL_DIR}")
+
+
+if __name__ == "__main__":
+    main()
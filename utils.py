@@ -1,21 +1,56 @@
+import hashlib
+import io
+import itertools
 import joblib
+import json
 import numpy as np
 import os
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import queue
 import requests
+import shutil
 import streamlit as st
+import tempfile
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
 from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier
+from sklearn.ensemble import HistGradientBoostingRegressor, HistGradientBoostingClassifier
 from sklearn.metrics import mean_absolute_error
+from threadpoolctl import threadpool_limits
 
 AQI_BUCKETS = ['Good', 'Satisfactory', 'Moderate', 'Poor', 'Very Poor', 'Severe']
+POLLUTANTS = ["PM2.5", "PM10", "NO2", "SO2", "CO", "O3"]
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(BASE_DIR, "data", "cleaned_station_day_with_station_info.csv")
 MODEL_DIR = os.path.join(BASE_DIR, "models")
 FORECAST_MODEL_DIR = os.path.join(BASE_DIR, "models_forecast")
+REPORT_DIR = os.path.join(BASE_DIR, "reports")
+CACHE_DIR = os.path.join(BASE_DIR, "cache")
+WAQI_BASE_URL = os.environ.get("WAQI_BASE_URL", "https://api.waqi.info")
+
+# Slices and column selections of the shared dataset are lazy views rather
+# than copies (always on from pandas 3).
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
 
 # -------------------------------------------
 # AQI Styling
 # -------------------------------------------
+# CPCB breakpoints: the upper AQI of each bucket except "Severe"
+AQI_THRESHOLDS = [50, 100, 200, 300, 400]
+
+def aqi_bucket_codes(aqi):
+    """Index into AQI_BUCKETS for each AQI value."""
+    return np.searchsorted(AQI_THRESHOLDS, np.asarray(aqi, dtype=float), side="left")
+
+def aqi_bucket(aqi):
+    return AQI_BUCKETS[int(aqi_bucket_codes(aqi))]
 
 def aqi_style(category):
     styles = {
@@ -39,11 +74,311 @@ def health_tip(category):
     }
     return tips.get(category, "")
 # -------------------------------------------
+# Dataset
+# -------------------------------------------
+DATASET_DTYPES = {
+    "City": "category",
+    "State": "category",
+    "AQI_Bucket": pd.CategoricalDtype(AQI_BUCKETS, ordered=True),
+    **{col: "float32" for col in POLLUTANTS + ["AQI"]},
+}
+
+def compact_dataset(df):
+    """
+    Drop the stray CSV index column and downcast to compact dtypes:
+    categoricals for the label columns and float32 for measurements.
+    Rows are ordered by City then Date so each city is a contiguous block
+    (by whichever of the two the frame has).
+    """
+    df = df.drop(columns=[c for c in df.columns if str(c).startswith("Unnamed")])
+
+    for col in df.columns:
+        if col in DATASET_DTYPES and df[col].dtype != DATASET_DTYPES[col]:
+            df[col] = df[col].astype(DATASET_DTYPES[col])
+        elif pd.api.types.is_float_dtype(df[col]) and df[col].dtype != "float32":
+            df[col] = df[col].astype("float32")
+
+    order = [c for c in ("City", "Date") if c in df.columns]
+    return df.sort_values(order, kind="stable").reset_index(drop=True)
+
+def read_dataset(path=DATA_PATH):
+    df = pd.read_csv(
+        path,
+        parse_dates=["Date"],
+        usecols=lambda c: not c.startswith("Unnamed"),
+        dtype=DATASET_DTYPES
+    )
+    return compact_dataset(df)
+
+def _file_stamp(path=DATA_PATH):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+def replace_file(path, write, suffix=".tmp"):
+    """
+    Call write(tmp_path) on a temp file next to path, then move it over
+    path. Every call gets its own temp file, so threads and processes
+    saving the same path at once never trip over each other, and readers
+    never see a partial file.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path),
+                                    prefix=os.path.basename(path) + ".", suffix=suffix)
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def _write_json(path, value):
+    def write(tmp_path):
+        with open(tmp_path, "w") as fh:
+            json.dump(value, fh)
+    replace_file(path, write)
+
+def freeze_frame(df):
+    """
+    The same data with every numpy array behind it (categorical codes
+    included) marked read-only, so writing through an array taken from
+    it raises instead of changing rows other sessions are reading.
+    """
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes = series.cat.codes.to_numpy(copy=True)
+            codes.setflags(write=False)
+            columns[col] = pd.Categorical.from_codes(codes, dtype=series.dtype)
+        elif isinstance(series.dtype, np.dtype):
+            values = series.to_numpy(copy=True)
+            values.setflags(write=False)
+            columns[col] = values
+        else:
+            columns[col] = series.array
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+@st.cache_resource(max_entries=1)
+def _shared_dataset(stamp):
+    return freeze_frame(read_dataset())
+
+def load_data():
+    """
+    Process-wide shared dataset, re-read when the file changes on disk.
+    The arrays are held once per process and frozen (see freeze_frame);
+    each call returns a shallow copy, so a caller that assigns columns or
+    rows gets its own copy of what it changes (Copy-on-Write) and never
+    touches the frame other sessions see.
+    """
+    return _shared_dataset(tuple(_file_stamp())).copy(deep=False)
+
+# -------------------------------------------
+# Data Version
+# -------------------------------------------
+# Content hashes of the dataset, per city. Caches and saved artifacts are
+# keyed on a city's hash, so editing the CSV only invalidates the cities
+# whose rows changed.
+DATA_MANIFEST_PATH = os.path.join(CACHE_DIR, "data_manifest.json")
+
+def _digest(data):
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+def city_hashes(df):
+    """Hash of each city's rows (all columns, in dataset order)."""
+    return {
+        str(city): _digest(pd.util.hash_pandas_object(rows, index=False).to_numpy().tobytes())
+        for city, rows in df.groupby("City", observed=True, sort=True)
+    }
+
+def build_data_manifest(df, stamp=None, previous=None):
+    """
+    {"stamp", "version", "cities": {city: hash}, "changed": [...],
+    "catalog": build_catalog(df)}; "changed" lists the cities that differ
+    from the previous manifest.
+    """
+    cities = city_hashes(df)
+    before = (previous or {}).get("cities", {})
+    return {
+        "stamp": stamp,
+        "version": _digest(json.dumps(cities, sort_keys=True).encode()),
+        "cities": cities,
+        "changed": sorted(city for city, digest in cities.items() if before.get(city) != digest),
+        "catalog": build_catalog(df),
+    }
+
+@st.cache_resource(max_entries=1)
+def _data_manifest(stamp):
+    stamp = list(stamp)
+    try:
+        with open(DATA_MANIFEST_PATH) as fh:
+            previous = json.load(fh)
+    except (OSError, ValueError):
+        previous = None
+
+    # The saved hashes stand while the file's size and mtime are unchanged
+    if previous and previous.get("stamp") == stamp and "catalog" in previous:
+        return previous
+
+    manifest = build_data_manifest(load_data(), stamp, previous)
+    _write_json(DATA_MANIFEST_PATH, manifest)
+    return manifest
+
+# Last manifest by stamp: skips hashing the cache_resource arguments on
+# hot paths (every prediction checks its city's data version)
+_manifest_memo = {}
+
+def get_data_manifest():
+    """Manifest of the dataset at DATA_PATH; see build_data_manifest."""
+    stamp = tuple(_file_stamp())
+    manifest = _manifest_memo.get(stamp)
+    if manifest is None:
+        manifest = _data_manifest(stamp)
+        _manifest_memo.clear()
+        _manifest_memo[stamp] = manifest
+    return manifest
+
+def city_data_version(city):
+    """Content hash of a city's rows, or None for cities not in the data."""
+    return get_data_manifest()["cities"].get(str(city))
+
+# -------------------------------------------
+# Data Catalog
+# -------------------------------------------
+# Rows a city needs to train its AQI models, and forecast rows (days with
+# a week of history behind them) to train its forecast model
+MIN_MODEL_ROWS = 300
+MIN_FORECAST_DAYS = 50
+
+def build_catalog(df):
+    """
+    Metadata the pages need without scanning rows: per city its state,
+    row count, first and last date, AQI sum and count (for averages) and
+    whether it can train the AQI and forecast models; per state its
+    cities. Saved with the data manifest.
+    """
+    cities = {}
+    for city, rows in df.groupby("City", observed=True, sort=True):
+        state = rows["State"].dropna() if "State" in rows.columns else ()
+        cities[str(city)] = {
+            "state": str(state.iloc[0]) if len(state) else None,
+            "rows": len(rows),
+            "first_date": str(rows["Date"].min().date()),
+            "last_date": str(rows["Date"].max().date()),
+            "aqi_sum": float(rows["AQI"].sum()),
+            "aqi_count": int(rows["AQI"].count()),
+            "model_eligible": len(rows) >= MIN_MODEL_ROWS,
+            "forecast_eligible": len(forecast_training_frame(rows)) >= MIN_FORECAST_DAYS,
+        }
+
+    states = {}
+    for city, info in cities.items():
+        if info["state"] is not None:
+            states.setdefault(info["state"], []).append(city)
+
+    return {"cities": cities, "states": states}
+
+def get_catalog():
+    """Catalog of the shared dataset; see build_catalog."""
+    return get_data_manifest()["catalog"]
+
+def catalog_cities(eligible=None):
+    """
+    Sorted city names. eligible="model" or "forecast" keeps only the
+    cities with enough data to train that model.
+    """
+    cities = get_catalog()["cities"]
+    if eligible is None:
+        return list(cities)
+    return [city for city, info in cities.items() if info[f"{eligible}_eligible"]]
+
+def normalize_city(city):
+    """
+    A typed or uploaded city name in the dataset's spelling ("delhi " ->
+    "Delhi"). Entry points normalize once, so imputation, model lookup
+    and cache keys all see the same name.
+    """
+    return str(city).strip().title()
+
+# -------------------------------------------
+# Date Index
+# -------------------------------------------
+class DateIndex:
+    """
+    Binary-search date-range lookups over a frame ordered by City then
+    Date (as compact_dataset leaves it). Each city is a contiguous row
+    block, so a city range is an iloc slice, i.e. a view; national
+    ranges go through a precomputed date order. Queries cost
+    O(log n + k) for k matching rows.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self.dates = df["Date"].to_numpy()
+
+        cities = df["City"].to_numpy()
+        starts = np.r_[0, np.flatnonzero(cities[1:] != cities[:-1]) + 1]
+        stops = np.r_[starts[1:], len(df)]
+        self.blocks = {str(cities[a]): (a, b) for a, b in zip(starts, stops)}
+
+        self.order = np.argsort(self.dates, kind="stable")
+        self.national_dates = self.dates[self.order]
+
+    def _bounds(self, dates, start, end):
+        lo = 0 if start is None else dates.searchsorted(pd.Timestamp(start).to_datetime64(), "left")
+        hi = len(dates) if end is None else dates.searchsorted(pd.Timestamp(end).to_datetime64(), "right")
+        return lo, hi
+
+    def query(self, city=None, start=None, end=None, columns=None):
+        """
+        Rows of one city (or all cities when None) with start <= Date <=
+        end, either bound optional, restricted to columns. City results
+        are date ordered views; national results are date ordered.
+        """
+        frame = self.df if columns is None else self.df[columns]
+
+        if city is None:
+            lo, hi = self._bounds(self.national_dates, start, end)
+            return frame.take(self.order[lo:hi])
+
+        a, b = self.blocks.get(str(city), (0, 0))
+        lo, hi = self._bounds(self.dates[a:b], start, end)
+        return frame.iloc[a + lo:a + hi]
+
+    def date_span(self, city=None):
+        """(first, last) Date of a city or the whole frame, or None if empty."""
+        if city is None:
+            dates = self.national_dates
+        else:
+            a, b = self.blocks.get(str(city), (0, 0))
+            dates = self.dates[a:b]
+        if not len(dates):
+            return None
+        return pd.Timestamp(dates[0]), pd.Timestamp(dates[-1])
+
+@st.cache_resource(max_entries=1)
+def _date_index(version):
+    return DateIndex(load_data())
+
+def get_date_index():
+    """DateIndex over the shared dataset, rebuilt when the data changes."""
+    return _date_index(get_data_manifest()["version"])
+
+def query_data(city=None, start=None, end=None, columns=None):
+    """Date-range query on the shared dataset; see DateIndex.query."""
+    return get_date_index().query(city, start, end, columns)
+
+# -------------------------------------------
 # Feature Engineering
 # -------------------------------------------
 
+FEATURES = ["PM2.5", "PM10", "NO2", "SO2",
+            "CO", "O3", "Month", "Dayofweek",
+            "PM2.5_lag1", "PM10_lag1"]
+
 def create_features(df):
-    df = df.sort_values("Date").copy()
+    df = df.sort_values("Date")
     df["Month"] = df["Date"].dt.month
     df["Dayofweek"] = df["Date"].dt.dayofweek
 
@@ -52,20 +387,308 @@ def create_features(df):
 
     df = df.dropna()
 
-    features = ["PM2.5", "PM10", "NO2", "SO2",
-                "CO", "O3", "Month", "Dayofweek",
-                "PM2.5_lag1", "PM10_lag1"]
-    return df, features
+    return df, list(FEATURES)
     
 # -------------------------------------------
-# City Model Trainer (Cached)
+# Imputation
+# -------------------------------------------
+def build_imputation_table(df):
+    """
+    Robust fill values for each pollutant: the median per city and
+    calendar month, falling back to the city's overall median, then the
+    national median for that month, then the national median. Returns
+    {"cities": {city: row}, "values": array (n_cities + 1, 12, n_pollutants)}
+    where the last row holds the national values.
+    """
+    month = df["Date"].dt.month.rename("Month")
+    cities = {str(city): i for i, city in enumerate(sorted(df["City"].unique()))}
+    values = np.full((len(cities) + 1, 12, len(POLLUTANTS)), np.nan)
+
+    by_city_month = df.groupby([df["City"], month], observed=True)[POLLUTANTS].median()
+    rows = by_city_month.index.get_level_values(0).map(lambda c: cities[str(c)])
+    values[rows, by_city_month.index.get_level_values(1) - 1] = by_city_month.to_numpy()
+
+    by_city = df.groupby("City", observed=True)[POLLUTANTS].median()
+    city_fill = np.full((len(cities), len(POLLUTANTS)), np.nan)
+    city_fill[by_city.index.map(lambda c: cities[str(c)])] = by_city.to_numpy()
+    values[:-1] = np.where(np.isnan(values[:-1]), city_fill[:, None, :], values[:-1])
+
+    national = df.groupby(month)[POLLUTANTS].median()
+    values[-1, national.index - 1] = national.to_numpy()
+    values[-1] = np.where(np.isnan(values[-1]), df[POLLUTANTS].median().to_numpy(), values[-1])
+    values[:-1] = np.where(np.isnan(values[:-1]), values[-1][None], values[:-1])
+
+    return {"cities": cities, "values": values}
+
+@st.cache_resource(max_entries=1)
+def _imputation_table(version):
+    return build_imputation_table(load_data())
+
+def get_imputation_table():
+    return _imputation_table(get_data_manifest()["version"])
+
+def impute_pollutants(cities, months, X, table=None):
+    """
+    Fill NaN pollutant values in X (rows x POLLUTANTS) from the lookup
+    table in one vectorized step. Returns (filled X, boolean mask of the
+    imputed cells).
+    """
+    table = table or get_imputation_table()
+    X = np.array(X, dtype=float)
+    missing = np.isnan(X)
+
+    if missing.any():
+        national = len(table["values"]) - 1
+        rows = np.array([table["cities"].get(normalize_city(c), national)
+                         for c in np.broadcast_to(cities, len(X))])
+        months = np.broadcast_to(np.asarray(months, dtype=int), len(X)) - 1
+        X[missing] = table["values"][rows, months][missing]
+
+    return X, missing
+
+def imputed_columns(mask):
+    """Names of the imputed pollutants for one row's mask."""
+    return [col for col, imputed in zip(POLLUTANTS, mask) if imputed]
+
+# -------------------------------------------
+# Model Profiles
 # -------------------------------------------
+# Size/accuracy operating points for the city models. "full" is the
+# original configuration; pick another per deployment with the
+# AQI_MODEL_PROFILE environment variable. "reg"/"clf" configure the
+# random forests, "hgb" both histogram gradient boosting models.
+MODEL_PROFILES = {
+    "full": {
+        "reg": {"n_estimators": 500, "max_depth": 25, "min_samples_split": 5},
+        "clf": {"n_estimators": 400, "max_depth": 20,
+                "min_samples_leaf": 2, "min_samples_split": 5},
+        "hgb": {"max_iter": 300, "learning_rate": 0.05, "max_leaf_nodes": 31},
+    },
+    "balanced": {
+        "reg": {"n_estimators": 100, "max_depth": 15,
+                "min_samples_leaf": 2, "min_samples_split": 5},
+        "clf": {"n_estimators": 80, "max_depth": 12,
+                "min_samples_leaf": 2, "min_samples_split": 5},
+        "hgb": {"max_iter": 150, "learning_rate": 0.1, "max_leaf_nodes": 31},
+    },
+    "compact": {
+        "reg": {"n_estimators": 40, "max_depth": 10, "min_samples_leaf": 4},
+        "clf": {"n_estimators": 30, "max_depth": 8, "min_samples_leaf": 4},
+        "hgb": {"max_iter": 60, "learning_rate": 0.1, "max_leaf_nodes": 15},
+    },
+    "tiny": {
+        "reg": {"n_estimators": 12, "max_depth": 7, "min_samples_leaf": 8},
+        "clf": {"n_estimators": 10, "max_depth": 6, "min_samples_leaf": 8},
+        "hgb": {"max_iter": 25, "learning_rate": 0.2, "max_leaf_nodes": 8},
+    },
+}
+MODEL_PROFILE = os.environ.get("AQI_MODEL_PROFILE", "full")
+
+def get_model_profile(profile=None):
+    name = profile or MODEL_PROFILE
+    if name not in MODEL_PROFILES:
+        raise ValueError(
+            f"Unknown model profile '{name}', expected one of {list(MODEL_PROFILES)}"
+        )
+    return MODEL_PROFILES[name]
+
+# -------------------------------------------
+# Compute Scheduler
+# -------------------------------------------
+# Every training, prediction and backtest call shares one fixed budget
+# of workers instead of each call spawning a thread per core.
+COMPUTE_WORKERS = int(os.environ.get("AQI_COMPUTE_WORKERS", os.cpu_count() or 1))
+
+_compute_local = threading.local()
+
+def current_session():
+    """Streamlit session id of the calling script, else the thread name."""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx(suppress_warning=True)
+    except ImportError:
+        ctx = None
+    return ctx.session_id if ctx else threading.current_thread().name
+
+class ComputeScheduler:
+    """
+    Fixed pool of worker threads with one FIFO per session. Workers serve
+    sessions round-robin, so a session that submits many tasks cannot
+    starve the others. Each task runs single-threaded.
+    """
+
+    def __init__(self, workers=COMPUTE_WORKERS):
+        self.workers = workers
+        self._cond = threading.Condition()
+        self._sessions = OrderedDict()
+        self._stats = Counter()
+
+        for i in range(workers):
+            threading.Thread(target=self._work, name=f"compute-{i}", daemon=True).start()
+
+    def submit(self, fn, *args, session=None, **kwargs):
+        future = Future()
+        with self._cond:
+            tasks = self._sessions.setdefault(session or current_session(), deque())
+            tasks.append((future, fn, args, kwargs))
+            self._stats["submitted"] += 1
+            self._cond.notify()
+        return future
+
+    def run(self, fn, *args, session=None, **kwargs):
+        # Already on a worker: run inline rather than wait on ourselves
+        if getattr(_compute_local, "active", False):
+            return fn(*args, **kwargs)
+        return self.submit(fn, *args, session=session, **kwargs).result()
+
+    def _next(self):
+        with self._cond:
+            while not self._sessions:
+                self._cond.wait()
+            session, tasks = next(iter(self._sessions.items()))
+            task = tasks.popleft()
+            if tasks:
+                self._sessions.move_to_end(session)
+            else:
+                del self._sessions[session]
+            return task
+
+    def _work(self):
+        _compute_local.active = True
+        while True:
+            future, fn, args, kwargs = self._next()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                with threadpool_limits(limits=1):
+                    result = fn(*args, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+            with self._cond:
+                self._stats["completed"] += 1
+
+    def stats(self):
+        with self._cond:
+            return {
+                "workers": self.workers,
+                "sessions_waiting": len(self._sessions),
+                "queued": sum(len(tasks) for tasks in self._sessions.values()),
+                **self._stats,
+            }
+
 @st.cache_resource
-def train_city_models(city, df):
-    city_df = df[df["City"] == city].copy()
+def get_scheduler():
+    return ComputeScheduler()
+
+def run_compute(fn, *args, session=None, **kwargs):
+    """Run fn on the shared compute scheduler and wait for its result."""
+    return get_scheduler().run(fn, *args, session=session, **kwargs)
+
+def _estimator_n_jobs():
+    # One thread per task on scheduler workers; all cores elsewhere
+    return 1 if getattr(_compute_local, "active", False) else -1
+
+@contextmanager
+def _worker_task():
+    """
+    Run a block (or, as a decorator, a function) as one unit of the
+    worker budget: estimators and BLAS single-threaded, run_compute
+    inline. For joblib jobs, which may run in the caller's own thread;
+    the thread's previous state is restored afterwards.
+    """
+    active = getattr(_compute_local, "active", False)
+    _compute_local.active = True
+    try:
+        with threadpool_limits(limits=1):
+            yield
+    finally:
+        _compute_local.active = active
 
-    if len(city_df) < 300:
-        return None, None
+# -------------------------------------------
+# Model Engines
+# -------------------------------------------
+def _random_forest(kind, params):
+    if kind == "reg":
+        return RandomForestRegressor(
+            **params["reg"],
+            random_state=42,
+            n_jobs=_estimator_n_jobs()
+        )
+    return RandomForestClassifier(
+        **params["clf"],
+        class_weight="balanced",
+        random_state=42,
+        n_jobs=_estimator_n_jobs()
+    )
+
+def _hist_gradient_boosting(kind, params):
+    if kind == "reg":
+        return HistGradientBoostingRegressor(
+            **params["hgb"],
+            early_stopping=False,
+            random_state=42
+        )
+    return HistGradientBoostingClassifier(
+        **params["hgb"],
+        class_weight="balanced",
+        early_stopping=False,
+        random_state=42
+    )
+
+# Estimator factories behind the city and forecast trainers. Pick one per
+# deployment with the AQI_MODEL_ENGINE environment variable.
+MODEL_ENGINES = {
+    "random_forest": _random_forest,
+    "hist_gradient_boosting": _hist_gradient_boosting,
+}
+MODEL_ENGINE = os.environ.get("AQI_MODEL_ENGINE", "random_forest")
+
+def make_estimator(kind, engine=None, profile=None):
+    """Unfitted regressor (kind="reg") or bucket classifier (kind="clf")."""
+    name = engine or MODEL_ENGINE
+    if name not in MODEL_ENGINES:
+        raise ValueError(
+            f"Unknown model engine '{name}', expected one of {list(MODEL_ENGINES)}"
+        )
+    return MODEL_ENGINES[name](kind, get_model_profile(profile))
+
+# How the AQI bucket is predicted: "classifier" fits a separate bucket
+# model, "thresholds" reads it off the predicted AQI with the CPCB
+# breakpoints (half the training, one model in memory, and the bucket
+# always agrees with the AQI). Set with AQI_BUCKET_MODE.
+BUCKET_MODE = os.environ.get("AQI_BUCKET_MODE", "classifier")
+
+class ThresholdClassifier:
+    """Bucket "classifier" that applies AQI_THRESHOLDS to a fitted AQI regressor."""
+
+    classes_ = np.arange(len(AQI_BUCKETS))
+
+    def __init__(self, reg):
+        self.reg = reg
+
+    def predict(self, X):
+        return aqi_bucket_codes(self.reg.predict(X))
+
+def predict_buckets(clf, X, aqi):
+    """Bucket codes for X; in thresholds mode straight from the already predicted AQI."""
+    if isinstance(clf, ThresholdClassifier):
+        return aqi_bucket_codes(aqi)
+    return run_compute(clf.predict, X)
+
+# -------------------------------------------
+# City Model Trainer (Cached)
+# -------------------------------------------
+def split_city_data(city, df):
+    """
+    Features and targets for one city, split chronologically 80/20.
+    Returns None when the city has fewer than 300 rows.
+    """
+    city_df = df[df["City"] == city]
+
+    if len(city_df) < MIN_MODEL_ROWS:
+        return None
 
     city_df, features = create_features(city_df)
 
@@ -78,7 +701,7 @@ def train_city_models(city, df):
         "Poor": 3,
         "Very Poor": 4,
         "Severe": 5
-    })
+    }).astype(int)
 
     split = int(len(city_df) * 0.8)
 
@@ -86,98 +709,1525 @@ def train_city_models(city, df):
     y_reg_train, y_reg_test = y_reg.iloc[:split], y_reg.iloc[split:]
     y_clf_train, y_clf_test = y_clf.iloc[:split], y_clf.iloc[split:]
 
-    reg = RandomForestRegressor(
-        n_estimators=500,
-        max_depth=25,
-        min_samples_split=5,
-        random_state=42,
-        n_jobs=-1
-    )
-
-    clf = RandomForestClassifier(
-        n_estimators=400,
-        max_depth=20,
-        min_samples_leaf=2,
-        min_samples_split=5,
-        class_weight="balanced",
-        random_state=42,
-        n_jobs=-1
-    )
+    return X_train, X_test, y_reg_train, y_reg_test, y_clf_train, y_clf_test
 
+def _fit_models(X_train, y_reg_train, y_clf_train, profile=None, engine=None,
+                bucket_mode=None):
+    reg = make_estimator("reg", engine, profile)
     reg.fit(X_train, y_reg_train)
+
+    if (bucket_mode or BUCKET_MODE) == "thresholds":
+        return reg, ThresholdClassifier(reg)
+
+    clf = make_estimator("clf", engine, profile)
     clf.fit(X_train, y_clf_train)
 
     return reg, clf
 
+def fit_city_models(city, df, profile=None, engine=None):
+    data = split_city_data(city, df)
+
+    if data is None:
+        return None, None
+
+    X_train, _, y_reg_train, _, y_clf_train, _ = data
+    return _fit_models(X_train, y_reg_train, y_clf_train, profile, engine)
+
 # -------------------------------------------
-# Prediction
+# Model Artifacts (memory-mapped)
 # -------------------------------------------
-def predict_aqi(city, inputs, df):
-    models = train_city_models(city, df)
+# sklearn copies tree nodes into private buffers when a forest is
+# unpickled, so a memory-mapped forest would still be duplicated per
+# process. Random forests are therefore stored as flat node arrays that
+# PackedForest predicts from directly; with joblib.load(mmap_mode="r")
+# those arrays stay in the OS page cache, shared by every worker.
+
+def pack_forest(forest):
+    """Flatten a fitted random forest into concatenated node arrays."""
+    trees = [est.tree_ for est in forest.estimators_]
+    offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+
+    def children(attr):
+        parts = []
+        for offset, tree in zip(offsets, trees):
+            child = getattr(tree, attr).astype(np.int32)
+            parts.append(np.where(child == -1, -1, child + offset))
+        return np.concatenate(parts)
+
+    values = np.concatenate([tree.value[:, 0, :] for tree in trees])
+    packed = {
+        "roots": offsets[:-1].astype(np.int32),
+        "children_left": children("children_left"),
+        "children_right": children("children_right"),
+        "feature": np.concatenate([tree.feature for tree in trees]).astype(np.int32),
+        "threshold": np.concatenate([tree.threshold for tree in trees]),
+        "max_depth": max(tree.max_depth for tree in trees),
+        "n_features": forest.n_features_in_,
+    }
+
+    if hasattr(forest, "classes_"):
+        packed["value"] = values / values.sum(axis=1, keepdims=True)
+        packed["classes"] = np.asarray(forest.classes_)
+    else:
+        packed["value"] = values[:, 0]
+
+    return packed
+
+def stack_forests(forests):
+    """
+    Pack regression forests with the same number of trees as one
+    multi-output forest: PackedForest.predict returns a column per
+    forest from a single traversal of all the trees.
+    """
+    packs = [pack_forest(forest) for forest in forests]
+    offsets = np.cumsum([0] + [len(p["value"]) for p in packs])
+
+    def shifted(key):
+        return np.concatenate([
+            np.where(p[key] == -1, -1, p[key] + offset).astype(np.int32)
+            for offset, p in zip(offsets, packs)
+        ])
+
+    return {
+        "roots": shifted("roots"),
+        "children_left": shifted("children_left"),
+        "children_right": shifted("children_right"),
+        "feature": np.concatenate([p["feature"] for p in packs]),
+        "threshold": np.concatenate([p["threshold"] for p in packs]),
+        "value": np.concatenate([p["value"] for p in packs]),
+        "max_depth": max(p["max_depth"] for p in packs),
+        "n_features": packs[0]["n_features"],
+        "n_outputs": len(packs),
+    }
+
+class PackedForest:
+    """Prediction-only random forest over (possibly memory-mapped) node arrays."""
+
+    chunk_size = 1024
+
+    def __init__(self, packed):
+        self.packed = packed
+        self.classes_ = packed.get("classes")
+        self.n_features_in_ = packed["n_features"]
+
+    def apply(self, X):
+        """Global leaf index reached in every tree, shape (n_rows, n_trees)."""
+        p = self.packed
+        X = np.asarray(X, dtype=np.float32)
+        node = np.repeat(p["roots"][None, :], len(X), axis=0)
+        rows = np.arange(len(X))[:, None]
+
+        for _ in range(p["max_depth"]):
+            left = p["children_left"][node]
+            internal = left != -1
+            if not internal.any():
+                break
+            go_left = X[rows, p["feature"][node]] <= p["threshold"][node]
+            step = np.where(go_left, left, p["children_right"][node])
+            node = np.where(internal, step, node)
+
+        return node
+
+    def _mean_value(self, X):
+        X = np.asarray(X)
+        outputs = self.packed.get("n_outputs")
+        parts = []
+        for i in range(0, len(X), self.chunk_size):
+            leaves = self.packed["value"][self.apply(X[i:i + self.chunk_size])]
+            if outputs:
+                # Stacked forests: trees are grouped by output
+                leaves = leaves.reshape(len(leaves), outputs, -1)
+            parts.append(leaves.mean(axis=-1 if outputs else 1))
+        return np.concatenate(parts)
+
+    def _path_contributions(self, X):
+        p = self.packed
+        value = p["value"]
+        n, n_features = len(X), self.n_features_in_
+        node = np.repeat(p["roots"][None, :], n, axis=0)
+        rows = np.arange(n)[:, None]
+        contrib = np.zeros((n * n_features,) + value.shape[1:])
+
+        for _ in range(p["max_depth"]):
+            left = p["children_left"][node]
+            internal = left != -1
+            if not internal.any():
+                break
+            feature = p["feature"][node]
+            go_left = X[rows, feature] <= p["threshold"][node]
+            step = np.where(go_left, left, p["children_right"][node])
+
+            # Each split moves the node mean; credit the change to the
+            # split feature and sum it over trees with one bincount
+            r, t = internal.nonzero()
+            slot = r * n_features + feature[r, t]
+            delta = value[step[r, t]] - value[node[r, t]]
+            if delta.ndim == 1:
+                contrib += np.bincount(slot, delta, minlength=len(contrib))
+            else:
+                for k in range(delta.shape[1]):
+                    contrib[:, k] += np.bincount(slot, delta[:, k], minlength=len(contrib))
+
+            node = np.where(internal, step, node)
+
+        return contrib.reshape((n, n_features) + value.shape[1:]) / len(p["roots"])
+
+    def contributions(self, X):
+        """
+        Exact decision-path decomposition of the forest output:
+        returns (bias, contributions) with predict(X) == bias +
+        contributions.sum(axis=1). Classifiers get a trailing class axis.
+        """
+        X = np.asarray(X, dtype=np.float32)
+        bias = self.packed["value"][self.packed["roots"]].mean(axis=0)
+        parts = [
+            self._path_contributions(X[i:i + self.chunk_size])
+            for i in range(0, len(X), self.chunk_size)
+        ]
+        return np.broadcast_to(bias, (len(X),) + bias.shape), np.concatenate(parts)
+
+    def predict_proba(self, X):
+        return self._mean_value(X)
+
+    def predict(self, X):
+        mean = self._mean_value(X)
+        if self.classes_ is None:
+            return mean
+        return self.classes_[mean.argmax(axis=1)]
+
+def city_model_path(city, profile=None, engine=None):
+    name = f"{city}__{engine or MODEL_ENGINE}__{profile or MODEL_PROFILE}.joblib"
+    return os.path.join(MODEL_DIR, name)
+
+def save_city_models(city, reg, clf, profile=None, engine=None, version=None):
+    """
+    Write uncompressed so the artifact can be memory-mapped on load.
+    version is the city's data version the models were fitted on. A
+    ThresholdClassifier is stored as None and rebuilt from reg on load.
+    """
+    if isinstance(clf, ThresholdClassifier):
+        clf = None
+    payload = {
+        name: pack_forest(model) if hasattr(model, "estimators_") else model
+        for name, model in (("reg", reg), ("clf", clf))
+    }
+    # Impurity importances need the fitted trees, so keep them alongside
+    for name, model in (("reg", reg), ("clf", clf)):
+        payload[f"{name}_importances"] = getattr(model, "feature_importances_", None)
+    payload["data_version"] = version
+
+    path = city_model_path(city, profile, engine)
+    replace_file(path, lambda tmp_path: joblib.dump(payload, tmp_path))
+    return path
+
+def load_city_importances(city, profile=None, engine=None):
+    """Saved impurity importances as {"reg": array, "clf": array}; None if unavailable."""
+    path = city_model_path(city, profile, engine)
+    if not os.path.exists(path):
+        return None
+
+    payload = joblib.load(path, mmap_mode="r")
+    return {name: payload.get(f"{name}_importances") for name in ("reg", "clf")}
+
+def load_city_models(city, profile=None, engine=None, mmap_mode="r", version=None):
+    """
+    Saved models, or None if missing, fitted on another data version, or
+    lacking the bucket classifier that BUCKET_MODE asks for.
+    """
+    path = city_model_path(city, profile, engine)
+    if not os.path.exists(path):
+        return None
 
-    if models == (None, None):
+    payload = joblib.load(path, mmap_mode=mmap_mode)
+    if version is not None and payload.get("data_version") != version:
+        return None
+    if payload["clf"] is None and BUCKET_MODE != "thresholds":
+        return None
+
+    reg, clf = (
+        PackedForest(model) if isinstance(model, dict) else model
+        for model in (payload["reg"], payload["clf"])
+    )
+    if BUCKET_MODE == "thresholds":
+        clf = ThresholdClassifier(reg)
+    return reg, clf
+
+def build_city_models(city, df, profile=None, engine=None, version=None):
+    """
+    Load the saved artifact, or fit, save and load it if missing or
+    fitted on another version of the city's data.
+    """
+    version = version or city_data_version(city)
+    models = load_city_models(city, profile, engine, version=version)
+    if models is not None:
+        return models
+
+    reg, clf = fit_city_models(city, df, profile, engine)
+    if reg is None:
         return None, None
 
-    reg, clf = models
+    save_city_models(city, reg, clf, profile, engine, version)
+    return load_city_models(city, profile, engine)
+
+def train_city_models(city, df, profile=None, engine=None):
+    """
+    Blocking counterpart of get_city_models. Goes through the same build
+    queue job, so it never fits a city the queue is already building;
+    the models are kept per city data version. Scripts that only call
+    this do not warm the queue with every other city.
+    """
+    return _build_queue().wait(city, df, profile, engine)
+
+# -------------------------------------------
+# Background Model Builds
+# -------------------------------------------
+MODEL_REQUESTS_PATH = os.path.join(MODEL_DIR, "requests.json")
+# Request counts are written at most this often, off the request path
+MODEL_REQUESTS_SAVE_SECONDS = 30
+
+class ModelBuildQueue:
+    """
+    Builds models on a background thread so page scripts never block on
+    training. A job's kind is "city" (the AQI regressor and bucket
+    classifier) or "pollutants" (the Forecast page's pollutant models).
+    Jobs are deduplicated per (city, profile, engine, kind) and rebuilt
+    when the city's data version changes;
+    user requests jump ahead of warm-up jobs, and within a tier the most
+    requested cities build first. Request counts persist in MODEL_DIR,
+    saved at most every MODEL_REQUESTS_SAVE_SECONDS.
+    """
+
+    def __init__(self, workers=1):
+        self._lock = threading.Condition()
+        self._queue = queue.PriorityQueue()
+        self._order = itertools.count()
+        self._jobs = {}
+        self._requests = Counter(self._read_requests())
+        self._save_timer = None
+
+        for _ in range(workers):
+            threading.Thread(target=self._work, daemon=True).start()
+
+    def _read_requests(self):
+        try:
+            with open(MODEL_REQUESTS_PATH) as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_requests(self):
+        with self._lock:
+            self._save_timer = None
+            requests = dict(self._requests)
+        _write_json(MODEL_REQUESTS_PATH, requests)
+
+    def _count_request(self, city):
+        # Called with the lock held; the first request after a save
+        # schedules the next one
+        self._requests[city] += 1
+        if self._save_timer is None:
+            self._save_timer = threading.Timer(MODEL_REQUESTS_SAVE_SECONDS, self._write_requests)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def _enqueue(self, key, df, tier):
+        # Called with the lock held. A job that is already queued is pushed
+        # again at the better priority; the stale entry is skipped later.
+        version = city_data_version(key[0])
+        job = self._jobs.get(key)
+        if job is None:
+            job = self._jobs[key] = {
+                "city": key[0], "state": "queued", "models": None,
+                "queued_at": time.time(), "started_at": None,
+                "finished_at": None, "error": None, "tier": tier,
+                "version": version, "kind": key[3],
+            }
+        elif job["state"] == "failed" or (
+            job["state"] in ("ready", "ineligible") and job["version"] != version
+        ):
+            job.update(state="queued", models=None, error=None,
+                       queued_at=time.time(), version=version)
+        elif job["state"] != "queued" or job["tier"] <= tier:
+            return job
+        else:
+            # Re-pushed with this df, so it is built for the current version;
+            # queued_at follows the new entry's place in the queue
+            job.update(version=version, queued_at=time.time())
+
+        job["tier"] = tier
+        priority = (tier, -self._requests[key[0]], next(self._order))
+        self._queue.put((priority, key, df))
+        return job
+
+    def _claim(self, job):
+        # Called with the lock held
+        job["state"] = "building"
+        job["started_at"] = time.time()
+
+    def _build(self, key, job, df, session):
+        builder = {"city": build_city_models, "pollutants": build_pollutant_models}[key[3]]
+        try:
+            models = run_compute(builder, key[0], df, key[1], key[2],
+                                 job["version"], session=session)
+            # Each builder's own "not enough data" result is kept as the models
+            ineligible = models is None or (key[3] == "city" and models == (None, None))
+            state = "ineligible" if ineligible else "ready"
+            error = None
+        except Exception as e:
+            models, state, error = None, "failed", str(e)
+
+        with self._lock:
+            job.update(models=models, state=state, error=error,
+                       finished_at=time.time())
+            self._lock.notify_all()
+
+    def _work(self):
+        while True:
+            priority, key, df = self._queue.get()
+            with self._lock:
+                job = self._jobs[key]
+                if job["state"] != "queued" or priority[0] != job["tier"]:
+                    continue
+                self._claim(job)
+
+            self._build(key, job, df, "model-builds")
+
+    def warm(self, df, cities, profile=None, engine=None, kind="city", tier=1):
+        """Queue background builds, most requested cities first."""
+        with self._lock:
+            ranked = sorted(cities, key=lambda c: -self._requests[c])
+            for city in ranked:
+                self._enqueue((city, profile, engine, kind), df, tier=tier)
+
+    def request(self, city, df, profile=None, engine=None, kind="city"):
+        """
+        Job record for a city, queuing a build on a miss. Never blocks:
+        check job["state"] for "ready", "queued", "building",
+        "ineligible" or "failed". A failed build is retried.
+        """
+        with self._lock:
+            self._count_request(city)
+            job = self._enqueue((city, profile, engine, kind), df, tier=0)
+            return dict(job)
+
+    def wait(self, city, df, profile=None, engine=None, kind="city"):
+        """
+        A city's models, blocking until its job finishes: a queued job
+        is built on the calling thread instead of waiting its turn, one
+        already building is waited on, so a city is never fitted twice
+        at once. Returns what the builder did, e.g. (None, None) for an
+        ineligible city job; raises RuntimeError when the build failed.
+        """
+        key = (city, profile, engine, kind)
+        with self._lock:
+            job = self._enqueue(key, df, tier=0)
+            while job["state"] == "building":
+                self._lock.wait()
+            claimed = job["state"] == "queued"
+            if claimed:
+                # Built from this df, not the queued entry's
+                job["version"] = city_data_version(city)
+                self._claim(job)
+
+        if claimed:
+            self._build(key, job, df, None)
+
+        with self._lock:
+            while job["state"] == "building":
+                self._lock.wait()
+            if job["state"] == "failed":
+                raise RuntimeError(f"Model build for {city} failed: {job['error']}")
+            return job["models"]
+
+    def state(self, city, profile=None, engine=None, kind="city"):
+        with self._lock:
+            job = self._jobs.get((city, profile, engine, kind))
+            return job["state"] if job else None
+
+    def position(self, city, profile=None, engine=None, kind="city"):
+        """1-based place among queued jobs, or None if not queued."""
+        with self._lock:
+            queued = sorted(
+                (key for key, job in self._jobs.items() if job["state"] == "queued"),
+                key=lambda k: (self._jobs[k]["tier"], -self._requests[k[0]],
+                               self._jobs[k]["queued_at"])
+            )
+        key = (city, profile, engine, kind)
+        return queued.index(key) + 1 if key in queued else None
+
+    def progress(self, kind=None):
+        """Counts of jobs (of one kind, or all) per state."""
+        with self._lock:
+            return dict(Counter(job["state"] for job in self._jobs.values()
+                                if kind in (None, job["kind"])))
+
+@st.cache_resource
+def _build_queue():
+    return ModelBuildQueue()
+
+@st.cache_resource
+def get_build_queue():
+    """Process-wide build queue, warmed with every eligible city on first use."""
+    build_queue = _build_queue()
+    cities = get_catalog()["cities"]
+    df = load_data()
+    # Larger cities first among those nobody has requested yet
+    eligible = sorted(catalog_cities("model"), key=lambda c: -cities[c]["rows"])
+    build_queue.warm(df, eligible)
+    # Pollutant models only serve the Forecast page, so they warm after
+    # every city model
+    forecast = set(catalog_cities("forecast"))
+    build_queue.warm(df, [c for c in eligible if c in forecast], kind="pollutants", tier=2)
+    return build_queue
+
+def model_eligible(city):
+    """
+    Whether the catalog gives the city enough rows for a model. Pages
+    check this before queuing, so no job is queued that cannot succeed.
+    """
+    info = get_catalog()["cities"].get(str(city))
+    return info is not None and info["model_eligible"]
+
+def get_city_models(city, df):
+    """(job state, models) without blocking; models is None until "ready"."""
+    if not model_eligible(city):
+        return "ineligible", None
+    job = get_build_queue().request(city, df)
+    return job["state"], job["models"]
+
+BUILD_STATUS_TEXT = {
+    # kind: (what is built, why an ineligible city has none)
+    "city": ("model", "Not enough data to train model for this city."),
+    "pollutants": ("pollutant forecast model",
+                   "Not enough consecutive days of data to forecast pollutants for this city."),
+}
+
+def show_build_status(city, kind="city"):
+    """Explain on a page why a city's model is not ready yet."""
+    build_queue = get_build_queue()
+    state = build_queue.state(city, kind=kind) if model_eligible(city) else "ineligible"
+    name, ineligible = BUILD_STATUS_TEXT[kind]
+
+    if state == "ineligible":
+        st.error(ineligible)
+    elif state == "failed":
+        st.error(f"The {name} build for {city} failed. It will be retried on the next request.")
+    else:
+        progress = build_queue.progress(kind)
+        done = progress.get("ready", 0) + progress.get("ineligible", 0)
+        total = sum(progress.values())
+        if state == "building":
+            st.info(f"⏳ The {name} for {city} is being built. Try again in a moment.")
+        else:
+            position = build_queue.position(city, kind=kind)
+            st.info(f"⏳ The {name} for {city} is queued (position {position}). Try again in a moment.")
+        st.progress(done / total if total else 0.0,
+                    text=f"{done} of {total} city {name}s ready")
+
+# -------------------------------------------
+# Model Size / Accuracy Report
+# -------------------------------------------
+def _artifact_stats(models, row, repeats):
+    buffer = io.BytesIO()
+    joblib.dump(models, buffer)
+    size_mb = buffer.tell() / 1e6
+
+    buffer.seek(0)
+    start = time.perf_counter()
+    joblib.load(buffer)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for model in models:
+            model.predict(row)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    return size_mb, load_ms, float(np.median(latencies))
+
+def profile_report(city, df, profiles=None, engine=None, repeats=30):
+    """
+    Fit the city models under each profile and report held-out MAE and
+    bucket accuracy next to fit time, artifact size, load time and
+    single-row predict latency. Returns None for cities below the
+    training threshold.
+    """
+    data = split_city_data(city, df)
+
+    if data is None:
+        return None
 
-    X = np.array(inputs).reshape(1, -1)
+    X_train, X_test, y_reg_train, y_reg_test, y_clf_train, y_clf_test = data
+    row = X_test.iloc[[0]]
+
+    rows = []
+    for name in profiles or MODEL_PROFILES:
+        start = time.perf_counter()
+        reg, clf = _fit_models(X_train, y_reg_train, y_clf_train, name, engine)
+        fit_s = time.perf_counter() - start
+
+        size_mb, load_ms, predict_ms = _artifact_stats((reg, clf), row, repeats)
+
+        rows.append({
+            "profile": name,
+            "engine": engine or MODEL_ENGINE,
+            "mae": mean_absolute_error(y_reg_test, reg.predict(X_test)),
+            "bucket_accuracy": float(np.mean(clf.predict(X_test) == y_clf_test)),
+            "fit_s": fit_s,
+            "size_mb": size_mb,
+            "load_ms": load_ms,
+            "predict_ms": predict_ms,
+        })
+
+    return pd.DataFrame(rows)
+
+def bucket_mode_report(city, df, profile=None, engine=None, repeats=30):
+    """
+    Compare the bucket classifier with CPCB thresholds on the predicted
+    AQI for one city: held-out bucket accuracy of each, how often they
+    agree, and fit time, artifact size and single-row predict latency
+    with and without the classifier. Returns None for cities below the
+    training threshold.
+    """
+    data = split_city_data(city, df)
+
+    if data is None:
+        return None
+
+    X_train, X_test, y_reg_train, y_reg_test, y_clf_train, y_clf_test = data
+    row = X_test.iloc[[0]]
+
+    start = time.perf_counter()
+    reg = make_estimator("reg", engine, profile).fit(X_train, y_reg_train)
+    reg_fit_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    clf = make_estimator("clf", engine, profile).fit(X_train, y_clf_train)
+    clf_fit_s = time.perf_counter() - start
+
+    classifier = clf.predict(X_test)
+    thresholds = aqi_bucket_codes(reg.predict(X_test))
+    y_clf_test = y_clf_test.to_numpy()
+
+    rows = []
+    for mode, models, buckets, fit_s in (
+        ("classifier", (reg, clf), classifier, reg_fit_s + clf_fit_s),
+        ("thresholds", (reg,), thresholds, reg_fit_s),
+    ):
+        size_mb, load_ms, predict_ms = _artifact_stats(models, row, repeats)
+        rows.append({
+            "bucket_mode": mode,
+            "bucket_accuracy": float(np.mean(buckets == y_clf_test)),
+            "agreement": float(np.mean(classifier == thresholds)),
+            "fit_s": fit_s,
+            "size_mb": size_mb,
+            "load_ms": load_ms,
+            "predict_ms": predict_ms,
+        })
+
+    return pd.DataFrame(rows)
+
+# -------------------------------------------
+# Prediction
+# -------------------------------------------
+# Inputs are rounded to the dataset's sensor precision before predicting,
+# so readings that differ only in noise share a prediction cache entry.
+PREDICTION_DECIMALS = 2
+PREDICTION_CACHE_SIZE = int(os.environ.get("AQI_PREDICTION_CACHE_SIZE", 256))
+PREDICTION_CACHE_TTL = float(os.environ.get("AQI_PREDICTION_CACHE_TTL", 3600))
+
+class PredictionCache:
+    """
+    Recent predictions per city, shared by every session: an LRU of at
+    most max_entries per city whose entries expire after ttl seconds. A
+    city's entries are dropped when its model version changes (data
+    version, profile, engine or bucket mode).
+    """
+
+    def __init__(self, max_entries=PREDICTION_CACHE_SIZE, ttl=PREDICTION_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._cities = {}
+        self._counts = Counter()
+
+    def _entries(self, city, version):
+        cached = self._cities.get(city)
+        if cached is not None and cached[0] != version:
+            self._counts["invalidations"] += 1
+            cached = None
+        if cached is None:
+            cached = self._cities[city] = (version, OrderedDict())
+        return cached[1]
+
+    def get(self, city, version, key, compute):
+        """Cached result for key, else compute(); None results are not kept."""
+        now = time.monotonic()
+        with self._lock:
+            entries = self._entries(city, version)
+            if key in entries:
+                expires, value = entries[key]
+                if expires > now:
+                    entries.move_to_end(key)
+                    self._counts["hits"] += 1
+                    return value
+                del entries[key]
+                self._counts["expired"] += 1
+            self._counts["misses"] += 1
+
+        value = compute()
+        if value is None:
+            return None
 
-    aqi_value = reg.predict(X)[0]
-    aqi_class_num = clf.predict(X)[0]
+        with self._lock:
+            entries = self._entries(city, version)
+            entries[key] = (now + self.ttl, value)
+            entries.move_to_end(key)
+            if len(entries) > self.max_entries:
+                entries.popitem(last=False)
+                self._counts["evictions"] += 1
+        return value
+
+    def stats(self):
+        with self._lock:
+            counts = {name: self._counts[name] for name in
+                      ("hits", "misses", "expired", "evictions", "invalidations")}
+            lookups = counts["hits"] + counts["misses"]
+            return {
+                **counts,
+                "hit_rate": counts["hits"] / lookups if lookups else 0.0,
+                "cities": len(self._cities),
+                "entries": sum(len(entries) for _, entries in self._cities.values()),
+            }
+
+@st.cache_resource
+def get_prediction_cache():
+    return PredictionCache()
+
+def prediction_version(city):
+    """Everything a city's predictions depend on besides the inputs."""
+    return (city_data_version(city), MODEL_PROFILE, MODEL_ENGINE, BUCKET_MODE)
+
+def _prediction_models(city, df, wait):
+    if wait:
+        return train_city_models(city, df)
+    _, models = get_city_models(city, df)
+    return models
+
+def _prediction_inputs(city, inputs):
+    X = np.array(inputs, dtype=float).reshape(1, -1)
+    if np.isnan(X).any():
+        X[:, :6], _ = impute_pollutants(city, X[0, 6], X[:, :6])
+        X[:, 8:10] = np.where(np.isnan(X[:, 8:10]), X[:, :2], X[:, 8:10])
+    return X.round(PREDICTION_DECIMALS)
+
+def _predict(city, X, df, wait):
+    models = _prediction_models(city, df, wait)
+
+    if models is None or models == (None, None):
+        return None
+
+    reg, clf = models
+
+    aqi_value = run_compute(reg.predict, X)[0]
+    aqi_class_num = predict_buckets(clf, X, [aqi_value])[0]
 
     aqi_class = AQI_BUCKETS[int(aqi_class_num)]
 
     return round(aqi_value, 2), aqi_class
 
+def predict_aqi(city, inputs, df, wait=True):
+    """
+    With wait=False the background build queue is used and (None, None)
+    is returned while the model is not ready; see get_city_models.
+    Repeated inputs are answered from the shared PredictionCache.
+    """
+    city = normalize_city(city)
+    X = _prediction_inputs(city, inputs)
+    result = get_prediction_cache().get(
+        city, prediction_version(city), ("predict", X.tobytes()),
+        lambda: _predict(city, X, df, wait)
+    )
+    return (None, None) if result is None else result
+
+def _explain(city, X, df, wait):
+    models = _prediction_models(city, df, wait)
+
+    if models is None or models == (None, None):
+        return None
+
+    reg, clf = models
+
+    if not hasattr(reg, "contributions"):
+        aqi_value = run_compute(reg.predict, X)[0]
+        aqi_class = AQI_BUCKETS[int(predict_buckets(clf, X, [aqi_value])[0])]
+        return round(aqi_value, 2), aqi_class, None, None
+
+    bias, contrib = run_compute(reg.contributions, X)
+    aqi_value = bias[0] + contrib[0].sum()
+    aqi_class = AQI_BUCKETS[int(predict_buckets(clf, X, [aqi_value])[0])]
+
+    return (round(aqi_value, 2), aqi_class, float(bias[0]),
+            dict(zip(FEATURES, contrib[0].tolist())))
+
+def explain_aqi(city, inputs, df, wait=True):
+    """
+    predict_aqi plus the AQI regressor's per-feature contributions:
+    returns (aqi, category, baseline, {feature: contribution}) where the
+    AQI is baseline + the sum of contributions. baseline and the dict are
+    None for engines without a packed forest (hist_gradient_boosting).
+    Cached like predict_aqi; the returned dict must not be modified.
+    """
+    city = normalize_city(city)
+    X = _prediction_inputs(city, inputs)
+    result = get_prediction_cache().get(
+        city, prediction_version(city), ("explain", X.tobytes()),
+        lambda: _explain(city, X, df, wait)
+    )
+    return (None, None, None, None) if result is None else result
+
+# -------------------------------------------
+# Bulk Scoring
+# -------------------------------------------
+SCORING_COLUMNS = ["Date", "City"] + POLLUTANTS
+
+def _score_city(city, rows, reg, clf, carry, explain=False):
+    """Feature matrix and predictions for one city's rows of a chunk."""
+    rows = rows.sort_values("Date", kind="stable")
+    dates = rows["Date"]
+
+    X = np.empty((len(rows), len(FEATURES)), dtype=np.float32)
+    X[:, 6] = dates.dt.month
+    X[:, 7] = dates.dt.dayofweek
+    X[:, :6], imputed = impute_pollutants(city, X[:, 6], rows[POLLUTANTS].to_numpy(dtype=float))
+    # Yesterday's PM values: the previous row, carried across chunks; the
+    # first reading of a city falls back to its own values
+    X[1:, 8:10] = X[:-1, :2]
+    X[0, 8:10] = carry if carry is not None else X[0, :2]
+
+    aqi = np.full(len(rows), np.nan)
+    bucket = np.full(len(rows), None, dtype=object)
+    complete = ~np.isnan(X).any(axis=1)
+    contrib = np.full((len(rows), len(FEATURES) + 1), np.nan) if explain else None
+
+    if reg is not None and complete.any():
+        if explain and hasattr(reg, "contributions"):
+            bias, paths = run_compute(reg.contributions, X[complete])
+            contrib[complete] = np.column_stack([bias, paths])
+            aqi[complete] = contrib[complete].sum(axis=1)
+        else:
+            aqi[complete] = run_compute(reg.predict, X[complete])
+        codes = predict_buckets(clf, X[complete], aqi[complete]).astype(int)
+        bucket[complete] = np.asarray(AQI_BUCKETS, dtype=object)[codes]
+
+    return rows.index, aqi, bucket, imputed, X[-1, :2].copy(), contrib
+
+def score_chunks(chunks, df, explain=False):
+    """
+    Score an iterable of raw input chunks (columns SCORING_COLUMNS).
+    Rows are grouped per city and predicted in one vectorized call per
+    city and chunk; yields each chunk with Predicted_AQI,
+    Predicted_Bucket and Imputed (the pollutants filled from the
+    imputation table, ";"-separated) added. Each city's rows should be in
+    date order across chunks so the lag features carry over correctly.
+    explain=True also adds the regressor's Baseline_AQI and one
+    Contribution_<feature> column per feature (see explain_aqi).
+    """
+    carry = {}
+    contrib_columns = ["Baseline_AQI"] + [f"Contribution_{f}" for f in FEATURES]
+
+    for chunk in chunks:
+        missing = [c for c in SCORING_COLUMNS if c not in chunk.columns]
+        if missing:
+            raise ValueError(f"Input is missing columns: {missing}")
+
+        chunk = chunk.assign(Date=pd.to_datetime(chunk["Date"]))
+        aqi = pd.Series(np.nan, index=chunk.index)
+        bucket = pd.Series(None, index=chunk.index, dtype=object)
+        imputed = pd.DataFrame(False, index=chunk.index, columns=POLLUTANTS)
+        contrib = pd.DataFrame(np.nan, index=chunk.index, columns=contrib_columns)
+
+        # Rows are grouped by normalized name, so "delhi" and "Delhi " share
+        # the Delhi model, imputation values and lag carry
+        cities = chunk["City"].map(normalize_city, na_action="ignore")
+        for city, rows in chunk.groupby(cities, sort=False):
+            reg, clf = train_city_models(city, df)
+            index, city_aqi, city_bucket, city_imputed, carry[city], city_contrib = _score_city(
+                city, rows, reg, clf, carry.get(city), explain
+            )
+            aqi[index] = city_aqi
+            bucket[index] = city_bucket
+            imputed.loc[index] = city_imputed
+            if explain:
+                contrib.loc[index] = city_contrib
+
+        scored = chunk.assign(
+            Predicted_AQI=aqi.round(2),
+            Predicted_Bucket=bucket,
+            Imputed=imputed.dot(pd.Index(POLLUTANTS) + ";").str.rstrip(";")
+        )
+        yield scored.join(contrib.round(3)) if explain else scored
+
+def score_csv(source, df, chunksize=50_000, explain=False):
+    """Stream a CSV through score_chunks without loading it whole."""
+    reader = pd.read_csv(source, chunksize=chunksize,
+                         usecols=lambda c: not c.startswith("Unnamed"))
+    yield from score_chunks(reader, df, explain)
+
+# -------------------------------------------
+# Hourly Rollups (out-of-core)
+# -------------------------------------------
+# Hourly station exports run to tens of millions of rows, so they are
+# rolled up to city-day rows in the dataset's layout in two passes:
+# chunks are reduced to per-(city, day) sums and counts appended to a
+# partial file per city, then each city's partials are combined on their
+# own. Peak memory is one chunk or one city, whichever is larger.
+ROLLUP_DIR = os.path.join(CACHE_DIR, "rollups")
+ROLLUP_MEASURES = POLLUTANTS + ["AQI"]
+HOURLY_COLUMNS = ["Datetime", "City"] + ROLLUP_MEASURES
+
+def _partition_path(directory, city):
+    return os.path.join(directory, str(city).replace(os.sep, "_") + ".csv")
+
+def _rollup_chunk(chunk, partial_dir):
+    day = pd.to_datetime(chunk["Datetime"]).dt.normalize().rename("Date")
+    grouped = chunk[ROLLUP_MEASURES].groupby([chunk["City"], day], observed=True, sort=False)
+    partial = grouped.sum().join(grouped.count(), rsuffix="_n")
+
+    for city, rows in partial.groupby(level="City", observed=True, sort=False):
+        path = _partition_path(partial_dir, city)
+        rows.to_csv(path, mode="a", header=not os.path.exists(path))
+
+def _combine_partials(path):
+    """One city's daily means from its appended partial sums and counts."""
+    partial = pd.read_csv(path, parse_dates=["Date"]).groupby(["City", "Date"]).sum()
+    sums = partial[ROLLUP_MEASURES].to_numpy()
+    counts = partial[[f"{col}_n" for col in ROLLUP_MEASURES]].to_numpy()
+
+    daily = pd.DataFrame(
+        np.where(counts > 0, sums / np.maximum(counts, 1), np.nan),
+        columns=ROLLUP_MEASURES, index=partial.index
+    ).reset_index()[["Date", "City"] + ROLLUP_MEASURES]
+
+    bucket = np.asarray(AQI_BUCKETS, dtype=object)[aqi_bucket_codes(daily["AQI"])]
+    daily["AQI_Bucket"] = np.where(daily["AQI"].isna(), None, bucket)
+    return daily
+
+def rollup_hourly(source, out_dir=ROLLUP_DIR, chunksize=1_000_000):
+    """
+    Roll an hourly CSV (columns HOURLY_COLUMNS, one row per station and
+    hour) up to daily city means, written as one partition CSV per city
+    in the dataset's layout. Returns the rollup manifest {"stamp",
+    "partitions": {city: path}, "versions": {city: hash}}. An existing
+    rollup of the same source file (size and mtime) is reused.
+    """
+    manifest_path = os.path.join(out_dir, "manifest.json")
+    stamp = _file_stamp(source)
+    try:
+        with open(manifest_path) as fh:
+            manifest = json.load(fh)
+        if manifest["stamp"] == stamp and all(map(os.path.exists, manifest["partitions"].values())):
+            return manifest
+    except (OSError, ValueError, KeyError):
+        pass
+
+    partial_dir = os.path.join(out_dir, "partials")
+    shutil.rmtree(partial_dir, ignore_errors=True)
+    os.makedirs(partial_dir)
+
+    reader = pd.read_csv(
+        source, usecols=HOURLY_COLUMNS, chunksize=chunksize,
+        dtype={"City": "category", **{col: "float32" for col in ROLLUP_MEASURES}}
+    )
+    for chunk in reader:
+        _rollup_chunk(chunk, partial_dir)
+
+    manifest = {"stamp": stamp, "partitions": {}, "versions": {}}
+    for name in sorted(os.listdir(partial_dir)):
+        daily = _combine_partials(os.path.join(partial_dir, name))
+        city = str(daily["City"].iloc[0])
+        path = _partition_path(out_dir, city)
+        replace_file(path, lambda tmp_path: daily.to_csv(tmp_path, index=False, float_format="%.2f"))
+        # Hash what readers will see after the CSV round trip
+        manifest["partitions"][city] = path
+        manifest["versions"][city] = city_hashes(read_dataset(path))[city]
+
+    shutil.rmtree(partial_dir)
+    # Written last, so it only ever lists partitions that are complete
+    _write_json(manifest_path, manifest)
+    return manifest
+
+def write_rollup_dataset(manifest, path):
+    """Concatenate the city partitions into one daily dataset CSV."""
+    def write(tmp_path):
+        with open(tmp_path, "w") as out:
+            for i, city in enumerate(sorted(manifest["partitions"])):
+                with open(manifest["partitions"][city]) as fh:
+                    header = fh.readline()
+                    if i == 0:
+                        out.write(header)
+                    shutil.copyfileobj(fh, out)
+
+    replace_file(os.path.abspath(path), write)
+    return path
+
+def train_rollup_models(manifest, cities=None, profile=None, engine=None):
+    """
+    Fit and save the city models from the rollup partitions one city at
+    a time, tagged with the partition's data version. Returns the cities
+    saved; cities below MIN_MODEL_ROWS are skipped.
+    """
+    saved = []
+    for city in cities or sorted(manifest["partitions"]):
+        city_df = read_dataset(manifest["partitions"][city])
+        reg, clf = fit_city_models(city, city_df, profile, engine)
+        if reg is None:
+            continue
+        save_city_models(city, reg, clf, profile, engine, manifest["versions"][city])
+        saved.append(city)
+    return saved
+
 # -------------------------------------------
 # Live AQI
 # -------------------------------------------
+LIVE_FRESH_SECONDS = int(os.environ.get("AQI_LIVE_FRESH_SECONDS", 600))
+LIVE_TIMEOUT_SECONDS = 5
+
+def _as_float(value):
+    # Offline WAQI stations report "-"; anything non-numeric becomes NaN
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+def request_live_aqi(city, token):
+    """
+    One WAQI call. Returns None when WAQI has no data for the city (or
+    no numeric AQI) and raises requests.RequestException or ValueError
+    when the upstream itself fails (network error, timeout, 5xx,
+    malformed body). Missing or non-numeric pollutants are NaN.
+    """
+    url = f"{WAQI_BASE_URL}/feed/{city}/?token={token}"
+
+    response = requests.get(url, timeout=LIVE_TIMEOUT_SECONDS)
+    if response.status_code >= 500:
+        response.raise_for_status()
+    data = response.json()
+
+    if data.get("status") != "ok":
+        return None
+
+    iaqi = data["data"].get("iaqi", {})
+
+    def get_val(key):
+        return _as_float(iaqi[key]["v"]) if key in iaqi else np.nan
+
+    aqi = _as_float(data["data"].get("aqi"))
+    if np.isnan(aqi):
+        return None
+
+    return{
+        "AQI": aqi,
+        "PM2.5": get_val("pm25"),
+        "PM10": get_val("pm10"),
+        "NO2": get_val("no2"),
+        "SO2": get_val("so2"),
+        "CO": get_val("co"),
+        "O3": get_val("o3"),
+        "dominant": data["data"].get("dominentpol", None)
+    }
+
+class CircuitBreaker:
+    """
+    Stops calling a failing upstream. After `threshold` consecutive
+    failures the circuit opens for `cooldown` seconds, then one trial
+    call is let through; its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, threshold=3, cooldown=30):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.time() - self._opened_at < self.cooldown:
+                return "open"
+            return "half-open"
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.time() - self._opened_at < self.cooldown or self._trial:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial = False
+            if self._failures >= self.threshold:
+                self._opened_at = time.time()
+
+class LiveReadings:
+    """
+    Stale-while-revalidate cache of WAQI readings. A reading older than
+    fresh_seconds is still returned at once, marked stale with its age,
+    while a single background refresh per city fetches a new one.
+    """
+
+    def __init__(self, fresh_seconds=LIVE_FRESH_SECONDS):
+        self.fresh_seconds = fresh_seconds
+        self.breaker = CircuitBreaker()
+        self._lock = threading.Lock()
+        self._readings = {}
+        self._refreshing = set()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="live-refresh")
+
+    def _fetch(self, key, city, token):
+        if not self.breaker.allow():
+            return None
+        try:
+            reading = request_live_aqi(city, token)
+        except (requests.RequestException, ValueError, KeyError):
+            self.breaker.record_failure()
+            return None
+
+        self.breaker.record_success()
+        if reading is not None:
+            with self._lock:
+                self._readings[key] = (reading, time.time())
+            get_live_history().record(city, reading)
+        return reading
+
+    def _refresh(self, key, city, token):
+        try:
+            self._fetch(key, city, token)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get(self, city, token):
+        key = city.strip().lower()
+        with self._lock:
+            cached = self._readings.get(key)
+
+        if cached is None:
+            reading = self._fetch(key, city, token)
+            if reading is None:
+                return None
+            return {**reading, "age_seconds": 0.0, "stale": False}
+
+        reading, fetched_at = cached
+        age = time.time() - fetched_at
+        stale = age >= self.fresh_seconds
+
+        if stale:
+            with self._lock:
+                start = key not in self._refreshing
+                self._refreshing.add(key)
+            if start:
+                self._executor.submit(self._refresh, key, city, token)
+
+        return {**reading, "age_seconds": age, "stale": stale}
+
+@st.cache_resource
+def get_live_readings():
+    return LiveReadings()
+
 def fetch_live_aqi(city):
         """
         Fetch real-time AQI and pollutant data using WAQI API
         City must be a valid WAQI city identifer.
+        Recent readings are served from cache (see LiveReadings); the
+        result carries "age_seconds" and "stale". Returns None when no
+        reading is available.
         """
         token = st.secrets["WAQI_TOKEN"] # Securely retrieve token
-        url = f"https://api.waqi.info/feed/{city}/?token={token}"
+        return get_live_readings().get(city, token)
+
+# -------------------------------------------
+# Recent Live Readings
+# -------------------------------------------
+LIVE_HISTORY_PATH = os.path.join(CACHE_DIR, "live_history.npz")
+LIVE_HISTORY_SAVE_SECONDS = 60
+LIVE_COLUMNS = ["AQI"] + POLLUTANTS
+
+class LiveHistory:
+    """
+    Fixed-size ring buffer per city of daily mean live readings. The slot
+    for a day is its ordinal modulo the capacity, so recording a reading,
+    looking up a lag and computing a short rolling mean are all O(1);
+    a slot left over from an older day is simply overwritten.
+    Buffers are reloaded on start and saved off the request path, at
+    most every save_seconds, merged with what other processes saved.
+    """
+
+    def __init__(self, capacity=32, path=LIVE_HISTORY_PATH,
+                 save_seconds=LIVE_HISTORY_SAVE_SECONDS):
+        self.capacity = capacity
+        self.path = path
+        self.save_seconds = save_seconds
+        self._lock = threading.Lock()
+        self._save_timer = None
+        self._buffers = self._read()
+
+    def _empty(self):
+        return {
+            "days": np.full(self.capacity, -1, dtype=np.int64),
+            "sums": np.zeros((self.capacity, len(LIVE_COLUMNS))),
+            "counts": np.zeros((self.capacity, len(LIVE_COLUMNS)), dtype=np.int64),
+        }
 
+    def _read(self):
+        buffers = {}
         try:
-            response = requests.get(url)
-            data = response.json()
-        except Exception as e:
-            return None
+            with np.load(self.path, allow_pickle=False) as stored:
+                for name in stored.files:
+                    city, field = name.rsplit("|", 1)
+                    buffers.setdefault(city, {})[field] = stored[name]
+        except (OSError, ValueError):
+            return {}
+
+        return {
+            city: buf for city, buf in buffers.items()
+            if set(buf) == {"days", "sums", "counts"} and len(buf["days"]) == self.capacity
+        }
 
-        if data["status"] != "ok":
+    def _merge(self, stored):
+        # Called with the lock held. Per slot the later day wins; for the
+        # same day the slot with more readings, since both may hold the
+        # readings loaded at start and adding them would count those twice.
+        for city, other in stored.items():
+            buf = self._buffers.setdefault(city, self._empty())
+            take = (other["days"] > buf["days"]) | (
+                (other["days"] == buf["days"])
+                & (other["counts"].sum(axis=1) > buf["counts"].sum(axis=1))
+            )
+            for field in ("days", "sums", "counts"):
+                buf[field][take] = other[field][take]
+
+    def _save(self):
+        stored = self._read()
+        with self._lock:
+            self._save_timer = None
+            self._merge(stored)
+            arrays = {f"{city}|{field}": arr.copy()
+                      for city, buf in self._buffers.items() for field, arr in buf.items()}
+        replace_file(self.path, lambda tmp_path: np.savez(tmp_path, **arrays), suffix=".npz")
+
+    def _schedule_save(self):
+        # Called with the lock held
+        if self._save_timer is None:
+            self._save_timer = threading.Timer(self.save_seconds, self._save)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def record(self, city, reading, when=None):
+        day = pd.Timestamp(when or pd.Timestamp.now()).toordinal()
+        values = np.array([_as_float(reading.get(col)) for col in LIVE_COLUMNS])
+        seen = ~np.isnan(values)
+
+        with self._lock:
+            buf = self._buffers.setdefault(normalize_city(city), self._empty())
+            slot = day % self.capacity
+            if buf["days"][slot] != day:
+                buf["days"][slot] = day
+                buf["sums"][slot] = 0.0
+                buf["counts"][slot] = 0
+            buf["sums"][slot, seen] += values[seen]
+            buf["counts"][slot, seen] += 1
+            self._schedule_save()
+
+    def _day_value(self, buf, day, column):
+        slot = day % self.capacity
+        col = LIVE_COLUMNS.index(column)
+        if buf["days"][slot] != day or buf["counts"][slot, col] == 0:
             return None
+        return buf["sums"][slot, col] / buf["counts"][slot, col]
+
+    def value(self, city, column, lag=0, today=None):
+        """Daily mean of a column `lag` days before today, or None."""
+        day = pd.Timestamp(today or pd.Timestamp.now()).toordinal() - lag
+        with self._lock:
+            buf = self._buffers.get(normalize_city(city))
+            return None if buf is None else self._day_value(buf, day, column)
+
+    def rolling_mean(self, city, column, window, lag=1, today=None):
+        """Mean over `window` days ending `lag` days ago, skipping empty days."""
+        values = [self.value(city, column, lag + i, today) for i in range(window)]
+        values = [v for v in values if v is not None]
+        return float(np.mean(values)) if values else None
+
+    def daily(self, city, column, days=None, today=None):
+        """Recorded daily means up to today as a date-indexed Series."""
+        today = pd.Timestamp(today or pd.Timestamp.now()).normalize()
+        days = min(days or self.capacity, self.capacity)
+        values = {}
+        for lag in range(days - 1, -1, -1):
+            value = self.value(city, column, lag, today)
+            if value is not None:
+                values[today - pd.Timedelta(days=lag)] = value
+        return pd.Series(values, dtype=float, name=column)
 
-        iaqi = data["data"]["iaqi"]
-
-        def get_val(key):
-            return iaqi[key]["v"] if key in iaqi else None
-
-        return{
-            "AQI": data["data"].get("aqi"),
-            "PM2.5": get_val("pm25"),
-            "PM10": get_val("pm10"),
-            "NO2": get_val("no2"),
-            "SO2": get_val("so2"),
-            "CO": get_val("co"),
-            "O3": get_val("o3"),
-            "dominant": data["data"].get("dominentpol", None)
-        }
+@st.cache_resource
+def get_live_history():
+    return LiveHistory()
+
+def live_features(city, reading, today=None):
+    """
+    Model inputs (FEATURES order) for a live reading: today's calendar
+    fields and yesterday's recorded PM values as the lags, falling back
+    to the current values when yesterday was not recorded. Pollutants
+    WAQI did not report are imputed. Returns (features, imputed names).
+    """
+    today = pd.Timestamp(today or pd.Timestamp.now())
+    history = get_live_history()
+
+    values = np.array([[reading.get(col) for col in POLLUTANTS]], dtype=float)
+    values, imputed = impute_pollutants(city, today.month, values)
+    current = dict(zip(POLLUTANTS, values[0]))
+
+    lags = []
+    for col in ["PM2.5", "PM10"]:
+        lag = history.value(city, col, lag=1, today=today)
+        lags.append(current[col] if lag is None else lag)
+
+    features = list(values[0]) + [today.month, today.dayofweek] + lags
+    return features, imputed_columns(imputed[0])
+
+def live_seed(city, today=None):
+    """
+    Starting point for a forecast from recorded live readings: the latest
+    day's pollutant means with the day before as PM lags, the last week's
+    daily pollutant means up to that day ("pollutants") and the recent
+    daily AQI for plotting. None unless today or yesterday has every
+    pollutant recorded.
+    """
+    today = pd.Timestamp(today or pd.Timestamp.now()).normalize()
+    history = get_live_history()
+
+    for lag in (0, 1):
+        values = {col: history.value(city, col, lag, today) for col in POLLUTANTS}
+        if None in values.values():
+            continue
+
+        for col in ["PM2.5", "PM10"]:
+            prev = history.value(city, col, lag + 1, today)
+            values[f"{col}_lag1"] = values[col] if prev is None else prev
+
+        aqi = history.daily(city, "AQI", today=today)
+        values["Date"] = today - pd.Timedelta(days=lag)
+        values["history"] = pd.DataFrame({"Date": aqi.index, "AQI": aqi.values})
+        values["pollutants"] = pd.DataFrame({
+            col: history.daily(city, col, days=7, today=values["Date"]) for col in POLLUTANTS
+        })
+        return values
+
+    return None
+
+def describe_age(seconds):
+    """Short human-readable age such as "4 min" or "2 h"."""
+    if seconds < 60:
+        return f"{int(seconds)} s"
+    if seconds < 3600:
+        return f"{int(seconds // 60)} min"
+    return f"{int(seconds // 3600)} h"
 # -------------------------------------------
 # History
 # -------------------------------------------
 def get_city_history(df, city):
-    city_df = df[df["City"] == city].copy()
-    city_df = city_df.sort_values("Date")
-    return city_df[["Date", "AQI"]]
+    # Selecting the rows already yields a new frame; no copy needed
+    return df.loc[df["City"] == city, ["Date", "AQI"]].sort_values("Date")
+
+# Enough points for a full-width chart; more only adds payload
+HISTORY_CHART_POINTS = 1500
+
+def minmax_downsample(y, n_out):
+    """
+    Sorted indices of at most n_out points of y: the first and last
+    point plus the lowest and highest point of each equal-count bucket,
+    so every peak and trough survives. y must not contain NaN.
+    """
+    n = len(y)
+    if n <= n_out:
+        return np.arange(n)
+
+    size = -(-n // max((n_out - 2) // 2, 1))
+    n_buckets = -(-n // size)
+    offsets = np.arange(n_buckets) * size
+
+    # Pad the last bucket so it never wins the min or the max
+    lows = np.full(n_buckets * size, np.inf)
+    highs = np.full(n_buckets * size, -np.inf)
+    lows[:n] = highs[:n] = y
+
+    return np.unique(np.concatenate([
+        [0, n - 1],
+        offsets + lows.reshape(n_buckets, size).argmin(axis=1),
+        offsets + highs.reshape(n_buckets, size).argmax(axis=1),
+    ]))
+
+@st.cache_data(max_entries=256)
+def _downsampled_history(city, start, end, max_points, version):
+    history = query_data(city, start, end, ["Date", "AQI"]).dropna(subset=["AQI"])
+    keep = minmax_downsample(history["AQI"].to_numpy(), max_points)
+    return history.iloc[keep].reset_index(drop=True)
+
+def city_history_chart(city, start=None, end=None, max_points=HISTORY_CHART_POINTS):
+    """
+    A city's AQI history between start and end (dates, inclusive),
+    downsampled with minmax_downsample to at most max_points for plotting. Cached per
+    city, range and data version.
+    """
+    return _downsampled_history(city, start, end, max_points, city_data_version(city))
+
+FORECAST_VERSIONS_PATH = os.path.join(FORECAST_MODEL_DIR, "versions.json")
+
+def _forecast_versions():
+    try:
+        with open(FORECAST_VERSIONS_PATH) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
 
 def load_forecast_model(city):
+    """
+    Saved forecast model, or None if missing or trained on another
+    version of the city's data (models saved without a version still load).
+    """
     model_path = os.path.join(FORECAST_MODEL_DIR, f"{city}_forecast.pkl")
     if not os.path.exists(model_path):
         return None
+    version = _forecast_versions().get(str(city))
+    if version is not None and version != city_data_version(city):
+        return None
     return joblib.load(model_path)
 
+# -------------------------------------------
+# Forecast Model Trainer
+# -------------------------------------------
+FORECAST_FEATURES = ["lag1", "lag2", "lag3", "roll3", "roll7",
+                     "day", "month", "weekday"]
+
+def daily_aqi(city_df):
+    """City AQI averaged over stations, one value per day."""
+    return city_df.groupby("Date")["AQI"].mean().sort_index()
+
+def forecast_training_frame(city_df):
+    """
+    Rows laid out like make_forecast_features: lags and rolling means of
+    the preceding days, calendar fields of the target day, then AQI.
+    """
+    aqi = daily_aqi(city_df)
+    prev = aqi.shift(1)
+
+    frame = pd.DataFrame({
+        "lag1": prev,
+        "lag2": aqi.shift(2),
+        "lag3": aqi.shift(3),
+        "roll3": prev.rolling(3).mean(),
+        "roll7": prev.rolling(7).mean(),
+        "day": aqi.index.day,
+        "month": aqi.index.month,
+        "weekday": aqi.index.weekday,
+        "AQI": aqi,
+    }, index=aqi.index)
+
+    return frame.dropna()
+
+def split_forecast_data(city, df):
+    """Chronological 80/20 split of a city's forecast rows, or None under 50 days."""
+    frame = forecast_training_frame(df[df["City"] == city])
+
+    if len(frame) < MIN_FORECAST_DAYS:
+        return None
+
+    X = frame[FORECAST_FEATURES].to_numpy()
+    y = frame["AQI"].to_numpy()
+    split = int(len(frame) * 0.8)
+
+    return X[:split], X[split:], y[:split], y[split:]
+
+def fit_forecast_model(city, df, profile=None, engine=None):
+    data = split_forecast_data(city, df)
+
+    if data is None:
+        return None
+
+    X_train, _, y_train, _ = data
+    model = make_estimator("reg", engine, profile)
+    model.fit(X_train, y_train)
+    return model
+
+def train_forecast_models(df, cities=None, profile=None, engine=None):
+    """
+    Fit and save a forecast model per city, recording the data version
+    each was trained on. Returns the cities saved.
+    """
+    versions = _forecast_versions()
+
+    saved = []
+    for city in cities or sorted(df["City"].unique()):
+        model = fit_forecast_model(city, df, profile, engine)
+        if model is None:
+            continue
+        replace_file(os.path.join(FORECAST_MODEL_DIR, f"{city}_forecast.pkl"),
+                     lambda tmp_path: joblib.dump(model, tmp_path))
+        versions[str(city)] = city_data_version(city)
+        saved.append(city)
+
+    # Written after the models, so it never records one that is missing
+    _write_json(FORECAST_VERSIONS_PATH, versions)
+
+    return saved
+
+def forecast_report(city, df, engines=None, profile=None, repeats=30):
+    """Held-out MAE, fit time, size and latency of the forecast model per engine."""
+    data = split_forecast_data(city, df)
+
+    if data is None:
+        return None
+
+    X_train, X_test, y_train, y_test = data
+
+    rows = []
+    for name in engines or MODEL_ENGINES:
+        model = make_estimator("reg", name, profile)
+
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_s = time.perf_counter() - start
+
+        size_mb, load_ms, predict_ms = _artifact_stats((model,), X_test[:1], repeats)
+
+        rows.append({
+            "engine": name,
+            "profile": profile or MODEL_PROFILE,
+            "mae": mean_absolute_error(y_test, model.predict(X_test)),
+            "fit_s": fit_s,
+            "size_mb": size_mb,
+            "load_ms": load_ms,
+            "predict_ms": predict_ms,
+        })
+
+    return pd.DataFrame(rows)
+
 def make_forecast_features(aqi_series, last_date):
     features = []
     lag1 = aqi_series[-1]
@@ -204,9 +2254,9 @@ def forecast_next_days(city, city_df, days=7):
     if model is None:
         return None
 
-    history = city_df.sort_values("Date")
-    aqi_series = list(history["AQI"].values)
-    last_date = history["Date"].iloc[-1]
+    history = daily_aqi(city_df)
+    aqi_series = list(history.values)
+    last_date = history.index[-1]
 
     forecasts = []
 
@@ -223,6 +2273,609 @@ def forecast_next_days(city, city_df, days=7):
 
     return forecasts
 
+# -------------------------------------------
+# Pollutant Forecast
+# -------------------------------------------
+# The city AQI model reads each day's pollutants, so a multi-day
+# forecast first rolls the pollutants forward: one model per pollutant
+# predicts tomorrow's city mean (on a log scale) from today's means,
+# the last seven days' means and tomorrow's calendar fields. Random
+# forests are stacked into one PackedForest so each step is a single
+# predict for all pollutants.
+POLLUTANT_FORECAST_FEATURES = (POLLUTANTS + [f"{col}_mean7" for col in POLLUTANTS]
+                               + ["Month", "Dayofweek"])
+
+def daily_pollutants(city_df):
+    """City pollutant means over stations, one row per day."""
+    return city_df.groupby("Date")[POLLUTANTS].mean().sort_index()
+
+def pollutant_training_frame(city_df):
+    """
+    Features in POLLUTANT_FORECAST_FEATURES order and the next day's
+    pollutant means as targets, for every recorded day followed by a
+    recorded day. The 7-day means skip missing days but need four.
+    """
+    daily = daily_pollutants(city_df)
+    daily = daily.reindex(pd.date_range(daily.index.min(), daily.index.max()))
+    mean7 = daily.rolling(7, min_periods=4).mean()
+
+    following = daily.index[1:]
+    X = np.column_stack([
+        daily.to_numpy()[:-1],
+        mean7.to_numpy()[:-1],
+        following.month,
+        following.dayofweek,
+    ])
+    y = daily.to_numpy()[1:]
+
+    keep = ~(np.isnan(X).any(axis=1) | np.isnan(y).any(axis=1))
+    return X[keep], y[keep]
+
+class PollutantForecaster:
+    """Next-day means of every pollutant, shape (n_rows, len(POLLUTANTS))."""
+
+    def __init__(self, models):
+        self.models = models
+
+    def predict(self, X):
+        if isinstance(self.models, PackedForest):
+            log_values = self.models.predict(X)
+        else:
+            log_values = np.column_stack([model.predict(X) for model in self.models])
+        return np.maximum(np.expm1(log_values), 0)
+
+def fit_pollutant_models(city, df, profile=None, engine=None):
+    """One regressor per pollutant, fitted on log1p values; None under MIN_FORECAST_DAYS rows."""
+    X, y = pollutant_training_frame(df[df["City"] == city])
+
+    if len(X) < MIN_FORECAST_DAYS:
+        return None
+
+    models = []
+    for i in range(len(POLLUTANTS)):
+        model = make_estimator("reg", engine, profile)
+        model.fit(X, np.log1p(y[:, i]))
+        models.append(model)
+    return models
+
+def pollutant_model_path(city, profile=None, engine=None):
+    name = f"{city}__pollutants__{engine or MODEL_ENGINE}__{profile or MODEL_PROFILE}.joblib"
+    return os.path.join(FORECAST_MODEL_DIR, name)
+
+def save_pollutant_models(city, models, profile=None, engine=None, version=None):
+    """Random forests are saved stacked, uncompressed so they can be memory-mapped."""
+    if all(hasattr(model, "estimators_") for model in models):
+        models = stack_forests(models)
+    payload = {"models": models, "data_version": version}
+
+    path = pollutant_model_path(city, profile, engine)
+    replace_file(path, lambda tmp_path: joblib.dump(payload, tmp_path))
+    return path
+
+def load_pollutant_models(city, profile=None, engine=None, version=None):
+    """Saved PollutantForecaster, or None if missing or fitted on another data version."""
+    path = pollutant_model_path(city, profile, engine)
+    if not os.path.exists(path):
+        return None
+
+    payload = joblib.load(path, mmap_mode="r")
+    if version is not None and payload.get("data_version") != version:
+        return None
+
+    models = payload["models"]
+    return PollutantForecaster(PackedForest(models) if isinstance(models, dict) else models)
+
+def build_pollutant_models(city, df, profile=None, engine=None, version=None):
+    """Load the saved pollutant models, fitting and saving them first if needed."""
+    version = version or city_data_version(city)
+    forecaster = load_pollutant_models(city, profile, engine, version)
+    if forecaster is not None:
+        return forecaster
+
+    models = fit_pollutant_models(city, df, profile, engine)
+    if models is None:
+        return None
+
+    save_pollutant_models(city, models, profile, engine, version)
+    return load_pollutant_models(city, profile, engine)
+
+def get_pollutant_models(city, df):
+    """
+    (job state, PollutantForecaster) without blocking, built on the same
+    queue as get_city_models; the forecaster is None until "ready".
+    """
+    if not model_eligible(city):
+        return "ineligible", None
+    job = get_build_queue().request(city, df, kind="pollutants")
+    return job["state"], job["models"]
+
+def forecast_pollutants(forecaster, recent, days):
+    """
+    Roll the pollutants forward from recent, a date-indexed frame of
+    daily POLLUTANTS means whose last row (the start day) is complete,
+    feeding each day's prediction into the next. Returns (dates, values
+    of shape (days, len(POLLUTANTS))).
+    """
+    start_date = recent.index[-1]
+    dates = pd.date_range(start_date + pd.Timedelta(days=1), periods=days)
+    window = recent.loc[recent.index > start_date - pd.Timedelta(days=7), POLLUTANTS]
+    window = window.to_numpy(dtype=float)
+    n = len(POLLUTANTS)
+
+    values = np.empty((days, n))
+    X = np.empty((1, len(POLLUTANT_FORECAST_FEATURES)))
+
+    for i, date in enumerate(dates):
+        X[0, :n] = window[-1]
+        X[0, n:2 * n] = np.nanmean(window, axis=0)
+        X[0, 2 * n:] = date.month, date.dayofweek
+        values[i] = forecaster.predict(X)[0]
+        window = np.vstack([window[-6:], values[i]])
+
+    return dates, values
+
+def forecast_city_aqi(reg, forecaster, recent, days):
+    """
+    Daily AQI forecast: pollutants rolled forward with forecast_pollutants,
+    then one batched AQI predict over the horizon, each day's PM lags
+    being the day before's values. Returns a DataFrame of Date, AQI and
+    the forecast pollutants.
+    """
+    dates, values = forecast_pollutants(forecaster, recent, days)
+
+    previous = np.vstack([recent[POLLUTANTS].to_numpy(dtype=float)[-1], values[:-1]])
+    lags = previous[:, [POLLUTANTS.index("PM2.5"), POLLUTANTS.index("PM10")]]
+    X = np.column_stack([values, dates.month, dates.dayofweek, lags])
+
+    forecast = pd.DataFrame(values, columns=POLLUTANTS)
+    forecast.insert(0, "Date", dates)
+    forecast.insert(1, "AQI", run_compute(reg.predict, X))
+    return forecast
+
+# -------------------------------------------
+# Backtesting
+# -------------------------------------------
+BACKTEST_CITY_PATH = os.path.join(REPORT_DIR, "backtest_city.csv")
+BACKTEST_HORIZON_PATH = os.path.join(REPORT_DIR, "backtest_horizon.csv")
+
+def backtest_windows(n_rows, n_folds=5, min_train_frac=0.5):
+    """
+    Rolling-origin test windows as (start, stop) row positions. Each fold
+    trains on everything before start and tests on [start, stop).
+    """
+    bounds = np.linspace(min_train_frac, 1.0, n_folds + 1) * n_rows
+    bounds = np.unique(bounds.astype(int))
+    return list(zip(bounds[:-1], bounds[1:]))
+
+def city_backtest_data(city, df):
+    """
+    Feature matrices for one city, built once and shared by every fold:
+    the city model features/targets, and for the forecast the city's
+    pollutant rows with its complete daily means and daily AQI. Keys are
+    None where the city is below a threshold.
+    """
+    city_df = df[df["City"] == city]
+    data = {"city": city, "city_model": None, "forecast": None}
+
+    if len(city_df) >= MIN_MODEL_ROWS:
+        frame, features = create_features(city_df)
+        data["city_model"] = {
+            "X": frame[features].to_numpy(dtype=np.float32),
+            "y_reg": frame["AQI"].to_numpy(dtype=np.float32),
+            "y_clf": frame["AQI_Bucket"].cat.codes.to_numpy(),
+            "dates": frame["Date"].to_numpy(),
+        }
+
+    # The served forecast needs the city AQI model as well as the
+    # pollutant models, and starts from a complete day
+    daily = daily_pollutants(city_df).dropna()
+    if data["city_model"] is not None and len(daily) >= MIN_FORECAST_DAYS:
+        data["forecast"] = dict(
+            data["city_model"],
+            rows=city_df[["City", "Date"] + POLLUTANTS],
+            daily=daily,
+            aqi=daily_aqi(city_df),
+        )
+
+    return data
+
+def _single_threaded(model):
+    # Folds already run one per process; nested n_jobs=-1 would oversubscribe
+    if "n_jobs" in model.get_params():
+        model.set_params(n_jobs=1)
+    return model
+
+def _backtest_city_fold(city, data, fold, start, stop, profile, engine):
+    X, y_reg, y_clf = data["X"], data["y_reg"], data["y_clf"]
+
+    reg = _single_threaded(make_estimator("reg", engine, profile))
+    reg.fit(X[:start], y_reg[:start])
+    aqi = reg.predict(X[start:stop])
+
+    if BUCKET_MODE == "thresholds":
+        buckets = aqi_bucket_codes(aqi)
+    else:
+        clf = _single_threaded(make_estimator("clf", engine, profile))
+        clf.fit(X[:start], y_clf[:start])
+        buckets = clf.predict(X[start:stop])
+
+    return [{
+        "city": city,
+        "fold": fold,
+        "cutoff": pd.Timestamp(data["dates"][start]).date(),
+        "train_rows": int(start),
+        "test_rows": int(stop - start),
+        "mae": mean_absolute_error(y_reg[start:stop], aqi),
+        "bucket_accuracy": float(np.mean(buckets == y_clf[start:stop])),
+    }]
+
+@_worker_task()
+def _backtest_forecast_fold(city, data, fold, start, stop, horizon, profile, engine):
+    daily, aqi = data["daily"], data["aqi"]
+    cutoff = daily.index[start]
+
+    # The Forecast page's models, fitted on the days before the fold and
+    # packed as they are when saved
+    reg = make_estimator("reg", engine, profile)
+    train = data["dates"] < cutoff.to_datetime64()
+    reg.fit(data["X"][train], data["y_reg"][train])
+    models = fit_pollutant_models(city, data["rows"][data["rows"]["Date"] < cutoff], profile, engine)
+    if models is None:
+        return []
+    if hasattr(reg, "estimators_"):
+        reg = PackedForest(pack_forest(reg))
+    if all(hasattr(model, "estimators_") for model in models):
+        models = PackedForest(stack_forests(models))
+    forecaster = PollutantForecaster(models)
+
+    # Every complete day in the window is a forecast origin, run through
+    # forecast_city_aqi as the page does; days without a recorded AQI
+    # are not scored
+    errors = np.full((stop - start, horizon), np.nan)
+    for i, pos in enumerate(range(start, stop)):
+        forecast = forecast_city_aqi(reg, forecaster, daily.iloc[:pos + 1], horizon)
+        actual = aqi.reindex(forecast["Date"]).to_numpy()
+        errors[i] = np.abs(forecast["AQI"].to_numpy() - actual)
+
+    rows = []
+    for step in range(horizon):
+        scored = ~np.isnan(errors[:, step])
+        if scored.any():
+            rows.append({
+                "city": city,
+                "fold": fold,
+                "horizon": step + 1,
+                "mae": float(errors[scored, step].mean()),
+                "n": int(scored.sum()),
+            })
+    return rows
+
+def run_backtests(df, cities=None, n_folds=5, horizon=14,
+                  profile=None, engine=None, n_jobs=None):
+    """
+    Rolling-origin backtest of the city models and of the Forecast
+    page's rolled pollutant forecast (forecast_city_aqi).
+    Features are built once per city, then every (city, fold) pair runs
+    as its own job across processes; joblib memory-maps the shared
+    feature arrays into the workers instead of copying them. Processes
+    default to the compute scheduler's worker budget.
+    Returns (per-city error table, per-horizon error table).
+    """
+    from joblib import Parallel, delayed
+
+    jobs = []
+    for city in cities or sorted(df["City"].unique()):
+        data = city_backtest_data(city, df)
+
+        if data["city_model"] is not None:
+            windows = backtest_windows(len(data["city_model"]["X"]), n_folds)
+            for fold, (start, stop) in enumerate(windows):
+                jobs.append(delayed(_backtest_city_fold)(
+                    city, data["city_model"], fold, start, stop, profile, engine
+                ))
+
+        if data["forecast"] is not None:
+            windows = backtest_windows(len(data["forecast"]["daily"]), n_folds)
+            for fold, (start, stop) in enumerate(windows):
+                jobs.append(delayed(_backtest_forecast_fold)(
+                    city, data["forecast"], fold, start, stop, horizon, profile, engine
+                ))
+
+    results = Parallel(n_jobs=n_jobs or COMPUTE_WORKERS)(jobs)
+    rows = [row for result in results for row in result]
+
+    city_table = pd.DataFrame([r for r in rows if "bucket_accuracy" in r],
+                              columns=["city", "fold", "cutoff", "train_rows",
+                                       "test_rows", "mae", "bucket_accuracy"])
+    horizon_table = pd.DataFrame([r for r in rows if "horizon" in r],
+                                 columns=["city", "fold", "horizon", "mae", "n"])
+    return city_table, horizon_table
+
+# -------------------------------------------
+# Feature Importance
+# -------------------------------------------
+FEATURE_IMPORTANCE_PATH = os.path.join(REPORT_DIR, "feature_importance.csv")
+
+def permutation_importances(model, X, y, score, n_repeats=5, seed=42):
+    """
+    Mean and std drop in `score` (higher is better) when each column of
+    X is shuffled, n_repeats times per column.
+    """
+    rng = np.random.default_rng(seed)
+    baseline = score(y, model.predict(X))
+    drops = np.empty((X.shape[1], n_repeats))
+
+    for col in range(X.shape[1]):
+        shuffled = X.copy()
+        for r in range(n_repeats):
+            shuffled[:, col] = rng.permutation(X[:, col])
+            drops[col, r] = baseline - score(y, model.predict(shuffled))
+
+    return drops.mean(axis=1), drops.std(axis=1)
+
+@_worker_task()
+def _importance_job(city, df, profile, engine, n_repeats, version):
+    reg, clf = build_city_models(city, df, profile, engine, version)
+    if reg is None:
+        return []
+
+    _, X_test, _, y_reg_test, _, y_clf_test = split_city_data(city, df)
+    X = X_test.to_numpy(dtype=np.float32)
+    impurity = load_city_importances(city, profile, engine) or {}
+
+    scores = {
+        "reg": (reg, y_reg_test.to_numpy(), lambda y, p: -mean_absolute_error(y, p)),
+        "clf": (clf, y_clf_test.to_numpy(), lambda y, p: float(np.mean(y == p))),
+    }
+
+    rows = []
+    for name, (model, y, score) in scores.items():
+        mean, std = permutation_importances(model, X, y, score, n_repeats)
+        imp = impurity.get(name)
+        for i, feature in enumerate(FEATURES):
+            rows.append({
+                "city": city,
+                "model": name,
+                "feature": feature,
+                "impurity": np.nan if imp is None else float(imp[i]),
+                "permutation": float(mean[i]),
+                "permutation_std": float(std[i]),
+                "n_test": len(X),
+                "data_version": version,
+            })
+    return rows
+
+def build_feature_importances(df, cities=None, profile=None, engine=None,
+                              n_repeats=5, n_jobs=None):
+    """
+    Impurity and permutation importances for every city model on its
+    held-out 20% split, one process per city within the compute budget.
+    Permutation importance is the MAE increase for the AQI regressor and
+    the accuracy drop for the bucket classifier.
+    """
+    from joblib import Parallel, delayed
+
+    versions = get_data_manifest()["cities"]
+    eligible = [city for city, n in df["City"].value_counts().items() if n >= MIN_MODEL_ROWS]
+    jobs = [delayed(_importance_job)(city, df, profile, engine, n_repeats, versions.get(str(city)))
+            for city in (cities or eligible)]
+
+    results = Parallel(n_jobs=n_jobs or COMPUTE_WORKERS)(jobs)
+    return pd.DataFrame([row for rows in results for row in rows],
+                        columns=["city", "model", "feature", "impurity",
+                                 "permutation", "permutation_std", "n_test",
+                                 "data_version"])
+
+def save_feature_importances(table):
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    table.to_csv(FEATURE_IMPORTANCE_PATH, index=False, float_format="%.6g")
+
+def load_feature_importances():
+    if not os.path.exists(FEATURE_IMPORTANCE_PATH):
+        return None
+    return pd.read_csv(FEATURE_IMPORTANCE_PATH, dtype={"data_version": str})
+
+def outdated_cities(table):
+    """Cities in a saved table whose data_version no longer matches the data."""
+    if "data_version" not in table.columns:
+        return []
+    versions = get_data_manifest()["cities"]
+    recorded = table.drop_duplicates("city").set_index("city")["data_version"]
+    return sorted(city for city, version in recorded.items() if versions.get(city) != version)
+
+def national_importances(table, model="reg"):
+    """Importances averaged over cities, weighted by held-out rows."""
+    rows = table[table["model"] == model]
+    weights = rows["n_test"]
+    national = (
+        rows[["impurity", "permutation"]]
+        .mul(weights, axis=0)
+        .groupby(rows["feature"])
+        .sum()
+        .div(weights.groupby(rows["feature"]).sum(), axis=0)
+    )
+    return national.reindex(FEATURES)
+
+def save_backtests(city_table, horizon_table):
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    city_table.to_csv(BACKTEST_CITY_PATH, index=False)
+    horizon_table.to_csv(BACKTEST_HORIZON_PATH, index=False)
+
+def load_backtests():
+    """Saved backtest tables, or (None, None) if no backtest has been run."""
+    if not (os.path.exists(BACKTEST_CITY_PATH) and os.path.exists(BACKTEST_HORIZON_PATH)):
+        return None, None
+    return pd.read_csv(BACKTEST_CITY_PATH), pd.read_csv(BACKTEST_HORIZON_PATH)
+
+# -------------------------------------------
+# Chart Cache
+# -------------------------------------------
+CHART_CACHE_MB = float(os.environ.get("AQI_CHART_CACHE_MB", 64))
+
+def _chart_nbytes(value):
+    if isinstance(value, bytes):
+        return len(value)
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(value.memory_usage(deep=True).sum())
+    return 1024
+
+class ChartCache:
+    """
+    LRU of rendered charts shared by every session: PNG bytes for
+    matplotlib figures, prepared frames for Streamlit's native charts.
+    Bounded by total size (AQI_CHART_CACHE_MB). Keys must carry whatever
+    the chart depends on (data version, city, range, theme, grid), and
+    cached frames must not be modified.
+    """
+
+    def __init__(self, max_mb=CHART_CACHE_MB):
+        self.max_bytes = max_mb * 1e6
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+        self._bytes = 0
+        self._counts = Counter()
+
+    def get(self, key, render):
+        """Cached chart for key, rendering it with render() on a miss."""
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self._counts["hits"] += 1
+                return self._items[key][0]
+            self._counts["misses"] += 1
+
+        value = render()
+        size = _chart_nbytes(value)
+
+        with self._lock:
+            if key not in self._items:
+                self._items[key] = (value, size)
+                self._bytes += size
+                while self._bytes > self.max_bytes and len(self._items) > 1:
+                    _, (_, evicted) = self._items.popitem(last=False)
+                    self._bytes -= evicted
+                    self._counts["evictions"] += 1
+        return value
+
+    def stats(self):
+        with self._lock:
+            return {**self._counts, "entries": len(self._items), "mb": self._bytes / 1e6}
+
+@st.cache_resource
+def get_chart_cache():
+    return ChartCache()
+
+def cached_chart(key, render):
+    return get_chart_cache().get(key, render)
+
+def figure_png(fig, dpi=100):
+    """
+    PNG bytes of a matplotlib Figure. Build figures with
+    matplotlib.figure.Figure rather than pyplot: they are never
+    registered globally, so nothing is left open once the bytes exist.
+    """
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=dpi, bbox_inches="tight", transparent=True)
+    return buffer.getvalue()
+
+def _render_forecast_chart(city, history, forecast, theme, show_grid):
+    from matplotlib.figure import Figure
+
+    fg = "white" if theme == "Dark" else "black"
+    fig = Figure(figsize=(10, 4))
+    ax = fig.subplots()
+    ax.plot(history["Date"], history["AQI"], label="Historical")
+    ax.plot(forecast["Date"], forecast["AQI"], marker="o", label="Forecast")
+
+    ax.set_title(f"{city} AQI Forecast", color=fg)
+    ax.set_xlabel("Date", color=fg)
+    ax.set_ylabel("AQI", color=fg)
+    ax.tick_params(colors=fg)
+    for spine in ax.spines.values():
+        spine.set_color(fg)
+    ax.legend()
+    ax.grid(show_grid)
+
+    return figure_png(fig)
+
+def forecast_chart(city, history, forecast, theme="Light", show_grid=True):
+    """
+    PNG of the Forecast page chart; history and forecast are frames with
+    Date and AQI. Cached on the city's data version and the plotted
+    values, so any change to the inputs renders a new chart.
+    """
+    points = np.concatenate([
+        pd.util.hash_pandas_object(frame[["Date", "AQI"]], index=False).to_numpy()
+        for frame in (history, forecast)
+    ])
+    key = ("forecast", city, city_data_version(city), len(history),
+           _digest(points.tobytes()), theme, show_grid)
+    return cached_chart(key, lambda: _render_forecast_chart(city, history, forecast, theme, show_grid))
+
+# -------------------------------------------
+# Data Export
+# -------------------------------------------
+# Arrow IPC streams and Parquet files for downstream consumers. Numeric
+# columns of the shared dataset go to Arrow without copying, and a city's
+# rows are a contiguous view (see DateIndex), so exports cost little
+# beyond serialization.
+EXPORT_KINDS = ["dataset", "features", "predictions"]
+EXPORT_FORMATS = {"arrow": ".arrows", "parquet": ".parquet"}
+FEATURE_EXPORT_COLUMNS = ["Date", "City"] + FEATURES + ["AQI", "AQI_Bucket"]
+
+@st.cache_resource(max_entries=64)
+def _feature_table(city, version):
+    frame, _ = create_features(query_data(city))
+    return pa.Table.from_pandas(frame[FEATURE_EXPORT_COLUMNS], preserve_index=False)
+
+def _slice_dates(table, start, end):
+    """Zero-copy date range of a date-sorted table."""
+    dates = table.column("Date").to_numpy()
+    lo = 0 if start is None else dates.searchsorted(pd.Timestamp(start).to_datetime64(), "left")
+    hi = len(dates) if end is None else dates.searchsorted(pd.Timestamp(end).to_datetime64(), "right")
+    return table.slice(lo, hi - lo)
+
+def export_table(kind, city=None, start=None, end=None, columns=None):
+    """
+    One of EXPORT_KINDS as an Arrow table, for a city (or every city)
+    between start and end, restricted to columns:
+    "dataset" is the cleaned history, "features" the model feature rows
+    with their targets (cached per city and data version), "predictions"
+    the bulk-scoring output (trains missing city models first).
+    """
+    if kind == "dataset":
+        return pa.Table.from_pandas(query_data(city, start, end, columns), preserve_index=False)
+
+    if kind == "features":
+        cities = [city] if city is not None else catalog_cities()
+        tables = [_slice_dates(_feature_table(c, city_data_version(c)), start, end)
+                  for c in cities]
+        table = pa.concat_tables(tables) if len(tables) > 1 else tables[0]
+        return table.select(columns) if columns else table
+
+    if kind == "predictions":
+        rows = query_data(city, start, end, SCORING_COLUMNS)
+        scored = pd.concat(score_chunks([rows], load_data()))
+        return pa.Table.from_pandas(scored[columns] if columns else scored, preserve_index=False)
+
+    raise ValueError(f"Unknown export kind '{kind}', expected one of {EXPORT_KINDS}")
+
+def write_export(table, sink, fmt="arrow"):
+    """Write table to a path or file-like sink as an Arrow IPC stream or Parquet."""
+    if fmt == "parquet":
+        pq.write_table(table, sink)
+    elif fmt == "arrow":
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        raise ValueError(f"Unknown export format '{fmt}', expected one of {list(EXPORT_FORMATS)}")
+
+def export_bytes(kind, fmt="arrow", **query):
+    """export_table serialized in memory, e.g. for a download button."""
+    sink = pa.BufferOutputStream()
+    write_export(export_table(kind, **query), sink, fmt)
+    return sink.getvalue().to_pybytes()
+
 # -------------------------------------------
 # Settings 
 # -------------------------------------------